@@ -0,0 +1,228 @@
+"""스캔 경로별 벤치마크 - 벽시계 시간, 최대 RSS, 초당 읽은 줄 수를 JSON Lines로 출력
+
+읽은 줄 = 사전 필터까지 간 줄 (파싱 + 버림), 모든 시나리오가 같은 ScanMetrics 계측 기준.
+
+각 시나리오는 별도 자식 프로세스에서 돌려서 최대 RSS가 서로 섞이지 않게 함.
+로그를 건드리는 시나리오(append_scan)는 반복마다 코퍼스 복사본에서 돌려서 원본은 그대로 둠.
+
+사용법:
+    python benchmarks/bench_scan.py                      # 임시 코퍼스 생성 후 전체 시나리오
+    python benchmarks/bench_scan.py --corpus DIR         # 기존 코퍼스 (DIR/.claude/projects)
+    python benchmarks/bench_scan.py --scenario cold_scan --repeat 5 --output bench_output.txt
+"""
+
+import argparse
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from claude_usage import DedupStore, ScanMetrics, UsageEngine  # noqa: E402
+from corpus import add_arguments, generate_corpus  # noqa: E402
+
+
+def peak_rss_bytes():
+    """현재 프로세스 최대 RSS (bytes)"""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(
+            ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb
+        )
+        return counters.PeakWorkingSetSize
+
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 bytes
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def count_lines(projects_dir):
+    lines = 0
+    for path in Path(projects_dir).rglob("*.jsonl"):
+        with open(path, "rb") as f:
+            lines += sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b""))
+    return lines
+
+
+def append_lines(projects_dir, count=200):
+    """가장 최근 파일들 끝에 새 assistant 줄 추가 (증분 수집 시나리오용)"""
+    files = sorted(Path(projects_dir).rglob("*.jsonl"), key=lambda p: p.stat().st_mtime)[-5:]
+    now = datetime.now(timezone.utc)
+    for i in range(count):
+        ts = now - timedelta(seconds=count - i)
+        line = {
+            "type": "assistant",
+            "message": {"id": f"msg_bench_{time.time_ns()}_{i}", "usage": {"input_tokens": 3, "output_tokens": 50}},
+            "uuid": f"bench-{i}",
+            "timestamp": ts.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        }
+        with open(files[i % len(files)], "a", encoding="utf-8") as f:
+            f.write(json.dumps(line, separators=(",", ":")) + "\n")
+
+
+def append_scan(engine, projects_dir):
+    append_lines(projects_dir)
+    return engine.scan()
+
+
+def legacy_full_parse(engine):
+    """인덱스 없이 모든 파일을 처음부터 파싱하는 예전 경로 (get_tokens_from_jsonl) → 계측"""
+    monday = engine.get_week_start()
+    msg_tokens = DedupStore()
+    metrics = ScanMetrics()
+    for path in engine.projects_dir.rglob("*.jsonl"):
+        engine.get_tokens_from_jsonl(path, monday, msg_tokens, metrics)
+    return metrics
+
+
+def parallel_scan(engine):
+    """프로세스 풀 강제 사용 (크기 기준 무시)"""
+    engine.ingester.workers = 4
+    engine.ingester.parallel_threshold = 0
+    return engine.scan()
+
+
+# 시나리오 이름 -> (캐시를 미리 채워 둘지, 실행 함수)
+# 초당 줄 수는 계측의 읽은 줄 기준 (아무것도 안 읽은 시나리오는 None)
+SCENARIOS = {
+    "cold_scan": (False, lambda engine, projects_dir: engine.scan()),
+    "cold_scan_parallel": (False, lambda engine, projects_dir: parallel_scan(engine)),
+    "warm_scan": (True, lambda engine, projects_dir: engine.scan()),
+    "append_scan": (True, append_scan),
+    "get_usage_since": (True, lambda engine, projects_dir: engine.get_usage_since(5)),
+    "get_weekly_usage": (True, lambda engine, projects_dir: engine.get_weekly_usage()),
+    "get_first_message_time": (True, lambda engine, projects_dir: engine.get_first_message_time()),
+    "legacy_full_parse": (False, lambda engine, projects_dir: legacy_full_parse(engine)),
+}
+
+# 로그 파일에 줄을 추가하는 시나리오
+MUTATING = {"append_scan"}
+
+
+def scan_metrics(result):
+    """시나리오 결과에서 ScanMetrics (스냅샷이면 그 계측, 조회만 했으면 None)"""
+    if isinstance(result, ScanMetrics):
+        return result
+    return getattr(result, "metrics", None)
+
+
+def run_one(name, claude_dir, repeat, lines):
+    """자식 프로세스에서 시나리오 하나 실행 → 결과 dict"""
+    prime, func = SCENARIOS[name]
+    walls = []
+    counts = []
+    for _ in range(repeat):
+        cache_dir = tempfile.mkdtemp(prefix="claude-usage-bench-")
+        run_dir = claude_dir
+        try:
+            if name in MUTATING:
+                run_dir = str(Path(cache_dir) / ".claude")
+                shutil.copytree(claude_dir, run_dir)
+            if prime:
+                # 최대 RSS에 안 섞이게 캐시 채우기는 CLI 프로세스로
+                subprocess.run(
+                    [sys.executable, "-m", "claude_usage", "--claude-dir", run_dir, "--cache-dir", cache_dir],
+                    cwd=str(REPO_ROOT), stdout=subprocess.DEVNULL, check=True,
+                )
+            engine = UsageEngine(claude_dir=run_dir, cache_dir=cache_dir)
+            start = time.perf_counter()
+            result = func(engine, Path(run_dir) / "projects")
+            walls.append(time.perf_counter() - start)
+            metrics = scan_metrics(result)
+            counts.append(None if metrics is None else
+                          (metrics.lines_parsed + metrics.lines_skipped, metrics.lines_parsed, metrics.bytes_read))
+            engine.close()
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    best = min(walls)
+    lines_read, lines_parsed, bytes_read = counts[walls.index(best)] or (None, None, None)
+    return {
+        "scenario": name,
+        "repeat": repeat,
+        "wall_s_min": round(best, 4),
+        "wall_s_median": round(statistics.median(walls), 4),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "corpus_lines": lines,
+        "lines_read": lines_read,
+        "lines_parsed": lines_parsed,
+        "bytes_read": bytes_read,
+        "lines_per_s": round(lines_read / best) if lines_read and best > 0 else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="claude_usage 스캔 경로 벤치마크")
+    parser.add_argument("--corpus", help="기존 코퍼스 폴더 (DIR/.claude/projects). 없으면 임시로 생성")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="실행할 시나리오 (여러 번 지정 가능, 기본: 전부)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="결과 JSON Lines를 저장할 파일 (기본: stdout)")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    parser.add_argument("--lines-total", type=int, help=argparse.SUPPRESS)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        print(json.dumps(run_one(args.run_one, args.corpus, args.repeat, args.lines_total)))
+        return 0
+
+    temp_dir = None
+    if args.corpus:
+        corpus_dir = Path(args.corpus)
+        corpus = {"lines": count_lines(corpus_dir / ".claude" / "projects")}
+    else:
+        temp_dir = corpus_dir = Path(tempfile.mkdtemp(prefix="claude-usage-corpus-"))
+        corpus = generate_corpus(
+            corpus_dir, args.projects, args.files, args.lines, args.days,
+            args.duplicate_ratio, args.corrupt_ratio, args.seed,
+        )
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for name in args.scenario or list(SCENARIOS):
+            result = subprocess.run(
+                [sys.executable, __file__, "--run-one", name, "--corpus", str(corpus_dir / ".claude"),
+                 "--repeat", str(args.repeat), "--lines-total", str(corpus["lines"])],
+                capture_output=True, text=True, check=True,
+            )
+            record = json.loads(result.stdout)
+            record.update({"corpus_" + k: v for k, v in corpus.items() if k != "lines"})
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
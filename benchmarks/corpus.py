@@ -0,0 +1,173 @@
+"""벤치마크용 가짜 ~/.claude 트리 생성기
+
+실제 Claude Code 로그처럼 user / assistant / tool_result 줄을 섞고,
+스트리밍 중 같은 메시지 ID가 output_tokens만 늘어난 채로 다시 찍히는 경우,
+ID 없는 usage 줄, 깨진 줄, 쓰다 만(개행 없는) 마지막 줄까지 만들어 줌.
+
+사용법: python benchmarks/corpus.py OUT_DIR [--projects 20] [--files 10] [--lines 2000] ...
+"""
+
+import argparse
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+MODELS = ["claude-sonnet-4-5-20250929", "claude-opus-4-1-20250805", "claude-haiku-4-5-20251001"]
+
+
+def iso(ts):
+    return ts.strftime("%Y-%m-%dT%H:%M:%S.") + f"{ts.microsecond // 1000:03d}Z"
+
+
+def base_fields(rng, session_id, cwd):
+    return {
+        "parentUuid": str(uuid.UUID(int=rng.getrandbits(128))),
+        "isSidechain": False,
+        "userType": "external",
+        "cwd": cwd,
+        "sessionId": session_id,
+        "version": "2.0.14",
+        "gitBranch": "main",
+    }
+
+
+def user_line(rng, ts, session_id, cwd):
+    record = base_fields(rng, session_id, cwd)
+    if rng.random() < 0.5:
+        content = "x" * rng.randint(20, 400)
+    else:
+        content = [{
+            "tool_use_id": f"toolu_{rng.getrandbits(64):016x}",
+            "type": "tool_result",
+            "content": [{"type": "text", "text": f"line {i}: " + "o" * rng.randint(10, 80)}
+                        for i in range(rng.randint(1, 40))],
+        }]
+    record.update({
+        "type": "user",
+        "message": {"role": "user", "content": content},
+        "uuid": str(uuid.UUID(int=rng.getrandbits(128))),
+        "timestamp": iso(ts),
+    })
+    return record
+
+
+def assistant_line(rng, ts, session_id, cwd, msg_id, output_tokens, with_id=True):
+    record = base_fields(rng, session_id, cwd)
+    message = {
+        "type": "message",
+        "role": "assistant",
+        "model": rng.choice(MODELS),
+        "content": [
+            {"type": "text", "text": "y" * rng.randint(20, 600)},
+            {"type": "tool_use", "id": f"toolu_{rng.getrandbits(64):016x}", "name": "Edit",
+             "input": {"file_path": f"{cwd}/src/mod.py", "old_string": "a\nb" * rng.randint(1, 30),
+                       "new_string": "c" * rng.randint(1, 200)}},
+        ],
+        "stop_reason": None,
+        "stop_sequence": None,
+        "usage": {
+            "input_tokens": rng.randint(1, 40),
+            "cache_creation_input_tokens": rng.randint(0, 4000),
+            "cache_read_input_tokens": rng.randint(0, 60000),
+            "cache_creation": {"ephemeral_5m_input_tokens": 0, "ephemeral_1h_input_tokens": 0},
+            "output_tokens": output_tokens,
+            "service_tier": "standard",
+        },
+    }
+    if with_id:
+        message = dict({"id": msg_id}, **message)
+    record.update({
+        "message": message,
+        "requestId": f"req_{rng.getrandbits(64):016x}",
+        "type": "assistant",
+        "uuid": str(uuid.UUID(int=rng.getrandbits(128))),
+        "timestamp": iso(ts),
+    })
+    return record
+
+
+def generate_file(path, rng, start, end, lines, duplicate_ratio, corrupt_ratio, cwd):
+    """start~end 사이에 시간순으로 lines줄짜리 세션 파일 생성 → 실제로 쓴 줄 수"""
+    session_id = path.stem
+    step = (end - start) / max(1, lines)
+    ts = start
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        while written < lines:
+            ts += step * rng.uniform(0.5, 1.5)
+            roll = rng.random()
+            if roll < corrupt_ratio:
+                # 깨진 줄 (중간에 잘린 JSON)
+                text = json.dumps(user_line(rng, ts, session_id, cwd), separators=(",", ":"))
+                f.write(text[:rng.randint(1, len(text) - 1)] + "\n")
+                written += 1
+            elif roll < 0.4:
+                f.write(json.dumps(user_line(rng, ts, session_id, cwd), separators=(",", ":")) + "\n")
+                written += 1
+            else:
+                msg_id = f"msg_{rng.getrandbits(96):024x}"
+                with_id = rng.random() > 0.01
+                output_tokens = rng.randint(1, 400)
+                # 스트리밍으로 같은 메시지가 여러 번 찍힘 (output_tokens만 증가)
+                repeats = 1 + (rng.randint(1, 3) if rng.random() < duplicate_ratio else 0)
+                for _ in range(repeats):
+                    record = assistant_line(rng, ts, session_id, cwd, msg_id, output_tokens, with_id)
+                    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                    output_tokens += rng.randint(1, 200)
+                    written += 1
+        if rng.random() < corrupt_ratio * 10:
+            # 아직 쓰는 중인 마지막 줄 (개행 없음)
+            f.write('{"type":"assistant","message":{"id":"msg_partial","usage":{"input_tok')
+    return written
+
+
+def generate_corpus(out_dir, projects=20, files=10, lines=2000, days=10, duplicate_ratio=0.3,
+                    corrupt_ratio=0.001, seed=0, now=None):
+    """out_dir/.claude/projects 아래에 가짜 로그 트리 생성 → {"files", "lines", "bytes"}"""
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    projects_dir = Path(out_dir) / ".claude" / "projects"
+    total_lines = 0
+    total_bytes = 0
+    file_count = 0
+    for p in range(projects):
+        cwd = f"/home/dev/project-{p}"
+        project_dir = projects_dir / cwd.replace("/", "-")
+        project_dir.mkdir(parents=True, exist_ok=True)
+        for _ in range(files):
+            # 세션 하나는 days 안의 임의 구간 (최근 세션일수록 많게)
+            end = now - timedelta(days=days * rng.random() ** 2)
+            start = end - timedelta(hours=rng.uniform(0.5, 12))
+            path = project_dir / f"{uuid.UUID(int=rng.getrandbits(128))}.jsonl"
+            total_lines += generate_file(path, rng, start, end, lines, duplicate_ratio, corrupt_ratio, cwd)
+            total_bytes += path.stat().st_size
+            file_count += 1
+    return {"files": file_count, "lines": total_lines, "bytes": total_bytes}
+
+
+def add_arguments(parser):
+    parser.add_argument("--projects", type=int, default=20, help="프로젝트 폴더 수")
+    parser.add_argument("--files", type=int, default=10, help="프로젝트당 세션 파일 수")
+    parser.add_argument("--lines", type=int, default=2000, help="파일당 줄 수")
+    parser.add_argument("--days", type=float, default=10, help="로그가 퍼져 있는 기간 (일)")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.3, help="다시 찍히는 메시지 비율")
+    parser.add_argument("--corrupt-ratio", type=float, default=0.001, help="깨진 줄 비율")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="벤치마크용 가짜 ~/.claude 트리 생성")
+    parser.add_argument("out_dir")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    stats = generate_corpus(
+        args.out_dir, args.projects, args.files, args.lines, args.days,
+        args.duplicate_ratio, args.corrupt_ratio, args.seed,
+    )
+    print(json.dumps(stats))
+
+
+if __name__ == "__main__":
+    main()
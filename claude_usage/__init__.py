@@ -0,0 +1,46 @@
+"""Claude Code 사용량 엔진 (헤드리스)
+
+~/.claude/projects JSONL 로그를 로컬 인덱스에 증분 수집하고 5시간 세션 / 주간 사용량을 계산.
+GUI 없이 import 하거나 `python -m claude_usage`로 CLI 실행 가능.
+"""
+
+from .archive import UsageArchive
+from .breakdown import UsageBreakdown
+from .engine import APP_NAME, UsageEngine, UsageSnapshot, default_cache_dir
+from .dedup import DedupStore, hash_key
+from .forecast import UsageForecast
+from .index import UsageIndex
+from .ingest import JsonlIngester
+from .metrics import MetricsLog, ScanMetrics
+from .plan import PLAN_LIMITS, WEEKLY_LIMITS, get_plan_tier, load_plan_info
+from .schedule import RefreshScheduler
+from .server import UsageDaemon, UsageServer
+from .sync import SnapshotSync
+from .watch import DirectoryWatcher
+from .worker import ScanWorker
+
+__all__ = [
+    "APP_NAME",
+    "DedupStore",
+    "DirectoryWatcher",
+    "JsonlIngester",
+    "MetricsLog",
+    "PLAN_LIMITS",
+    "RefreshScheduler",
+    "ScanMetrics",
+    "ScanWorker",
+    "SnapshotSync",
+    "UsageArchive",
+    "UsageBreakdown",
+    "UsageDaemon",
+    "UsageEngine",
+    "UsageForecast",
+    "UsageIndex",
+    "UsageServer",
+    "UsageSnapshot",
+    "WEEKLY_LIMITS",
+    "default_cache_dir",
+    "get_plan_tier",
+    "hash_key",
+    "load_plan_info",
+]
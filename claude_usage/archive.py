@@ -0,0 +1,269 @@
+"""사용량 장기 보관소 - 시간 롤업을 달마다 압축해서 인덱스와 따로 저장
+
+- 인덱스는 캐시라 스키마가 바뀌면 버리고 원본 로그도 지워질 수 있어서, 지난 기록은 여기에 남김
+- 최근 HOURLY_MONTHS개월은 시간별, 그보다 오래된 달은 일별로 줄여서 보관 (달/일은 로컬 시간 기준,
+  시간 버킷은 UTC 정시라 30분 단위 시간대에서는 자정에 걸친 한 시간이 앞 날짜로 들어감)
+- 한 달 = 한 행 (zlib으로 압축한 int64 배열) → 1년치를 봐도 행 12개만 풀면 됨
+"""
+
+import sqlite3
+import threading
+import zlib
+from array import array
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+HOUR = 3600
+DAY = 86400
+
+# 기록 보기 단위별 기본 구간 수
+HISTORY_PERIODS = {"hour": 48, "day": 30, "week": 12, "month": 12}
+
+
+def month_key(moment):
+    """date/datetime → 월 키 (연 * 12 + 월 - 1)"""
+    return moment.year * 12 + moment.month - 1
+
+
+def month_start(key):
+    """월 키 → 그 달 1일 0시 (naive 로컬)"""
+    return datetime(key // 12, key % 12 + 1, 1)
+
+
+def month_layout(key, resolution):
+    """월 키 → (첫 버킷 번호, 버킷 수)
+
+    시간별은 epoch 시간 버킷(시작 시각이 그 달 안인 것), 일별은 date.toordinal() 기준
+    """
+    start = month_start(key)
+    end = month_start(key + 1)
+    if resolution == HOUR:
+        first = -(-int(start.timestamp()) // HOUR)
+        return first, -(-int(end.timestamp()) // HOUR) - first
+    return start.toordinal(), (end - start).days
+
+
+def _pack(values):
+    return zlib.compress(array("q", values).tobytes())
+
+
+def _unpack(data):
+    values = array("q")
+    values.frombytes(zlib.decompress(data))
+    return values
+
+
+class UsageArchive:
+    """시간별 사용량(input + output) 장기 보관소
+
+    - update(): 인덱스가 다 가진 최근 구간은 덮어쓰고, 그 앞(예전 로그 채우기 포함)은 버킷별 최대값으로 합침
+      (같은 구간을 여러 번 넣어도 안전)
+    - history(): 시간 / 일 / 주 / 월 단위 합계 (빈 구간은 0)
+    - 스캔 워커와 기록 창이 다른 스레드에서 쓰므로 연결 하나를 lock으로 보호
+    """
+
+    HOURLY_MONTHS = 3
+    SCHEMA_VERSION = 1
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS months (
+            month INTEGER PRIMARY KEY,
+            resolution INTEGER NOT NULL,
+            data BLOB NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value
+        );
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.Error:
+            self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        # 캐시가 아니라서 버전이 달라도 버리지 않음 (바뀌면 여기서 옮김)
+        self.conn.executescript(self.SCHEMA)
+        self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self.conn.commit()
+        self.lock = threading.Lock()
+
+    def get_meta(self, key, default=None):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else default
+
+    def set_meta(self, key, value):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+            self.conn.commit()
+
+    def update(self, index, since_ts, now=None):
+        """인덱스 시간 롤업 중 since_ts 이후를 반영 (처음이면 인덱스에 남은 전부) → 바뀐 달 수
+
+        since_ts 이후로 시작하는 시간 버킷은 인덱스가 그 구간을 전부 수집해 둔 상태라 그대로 덮어씀
+        (다시 나온 메시지가 다음 시간으로 옮겨 가면 앞 버킷이 줄어들어야 함).
+        since_ts가 0이면(처음 / 예전 로그 채우기) 덮어쓰지 않고 버킷별 최대값으로만 합침
+        """
+        now = now or datetime.now()
+        with self.lock:
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'merged'").fetchone() is None:
+                since_ts = 0
+                self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('merged', 1)")
+            overwrite_from = -(-int(since_ts) // HOUR) if since_ts > 0 else None
+            changed = self._merge(index.hour_series(since_ts), month_key(now), overwrite_from,
+                                  int(now.timestamp()) // HOUR)
+            changed += self._downsample(month_key(now))
+            if self.conn.in_transaction:
+                self.conn.commit()
+        return changed
+
+    def _load(self, key):
+        row = self.conn.execute("SELECT resolution, data FROM months WHERE month = ?", (key,)).fetchone()
+        if row is None:
+            return None, None
+        return row[0], _unpack(row[1])
+
+    def _save(self, key, resolution, values):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO months (month, resolution, data) VALUES (?, ?, ?)",
+            (key, resolution, _pack(values))
+        )
+
+    def _merge(self, hours, current_key, overwrite_from=None, until_bucket=None):
+        """시간 롤업 반영 - overwrite_from(시간 버킷) ~ until_bucket은 덮어쓰고 나머지는 최대값"""
+        by_month = {}
+        for bucket, tokens in hours:
+            if tokens > 0 or overwrite_from is not None:
+                key = month_key(datetime.fromtimestamp(bucket * HOUR))
+                by_month.setdefault(key, {})[bucket] = tokens
+        if overwrite_from is not None:
+            # 인덱스에 행이 없는(0이 된) 버킷도 덮어써야 하니 구간에 걸친 달은 전부
+            for key in range(month_key(datetime.fromtimestamp(overwrite_from * HOUR)), current_key + 1):
+                by_month.setdefault(key, {})
+
+        changed = 0
+        for key, rows in by_month.items():
+            resolution, values = self._load(key)
+            if resolution is None:
+                if not rows:
+                    continue
+                resolution = HOUR if key > current_key - self.HOURLY_MONTHS else DAY
+            first, length = month_layout(key, resolution)
+            merged = array("q", values) if values is not None else array("q", [0]) * length
+            if resolution == HOUR:
+                if overwrite_from is not None:
+                    last = until_bucket if until_bucket is not None else first + length - 1
+                    for i in range(max(0, overwrite_from - first), min(length, last - first + 1)):
+                        merged[i] = rows.get(first + i, 0)
+                for bucket, tokens in rows.items():
+                    i = bucket - first
+                    if overwrite_from is not None and bucket >= overwrite_from:
+                        continue  # 위에서 덮어씀
+                    if 0 <= i < length and tokens > merged[i]:
+                        merged[i] = tokens
+            else:
+                # 이미 일별로 줄인 달 (예전 로그 채우기) - 하루 합계끼리 최대값
+                days = {}
+                for bucket, tokens in rows.items():
+                    i = datetime.fromtimestamp(bucket * HOUR).day - 1
+                    days[i] = days.get(i, 0) + tokens
+                for i, tokens in days.items():
+                    if tokens > merged[i]:
+                        merged[i] = tokens
+            if merged != values:
+                self._save(key, resolution, merged)
+                changed += 1
+        return changed
+
+    def _downsample(self, current_key):
+        """HOURLY_MONTHS개월보다 오래된 시간별 달을 일별로 줄임"""
+        rows = self.conn.execute(
+            "SELECT month, data FROM months WHERE resolution = ? AND month <= ?",
+            (HOUR, current_key - self.HOURLY_MONTHS)
+        ).fetchall()
+        for key, data in rows:
+            first, _ = month_layout(key, HOUR)
+            days = array("q", [0]) * month_layout(key, DAY)[1]
+            for i, tokens in enumerate(_unpack(data)):
+                if tokens:
+                    days[datetime.fromtimestamp((first + i) * HOUR).day - 1] += tokens
+            self._save(key, DAY, days)
+        return len(rows)
+
+    def _months(self, first_key, last_key):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT month, resolution, data FROM months WHERE month >= ? AND month <= ?",
+                (first_key, last_key)
+            ).fetchall()
+        return [(key, resolution, _unpack(data)) for key, resolution, data in rows]
+
+    def hours(self, since_ts, until_ts):
+        """[since_ts, until_ts) 시간 버킷별 {버킷: 토큰} (일별로 줄인 달은 빠짐)"""
+        first_bucket = int(since_ts // HOUR)
+        last_bucket = int(until_ts // HOUR)
+        totals = {}
+        for key, resolution, values in self._months(month_key(datetime.fromtimestamp(since_ts)),
+                                                    month_key(datetime.fromtimestamp(until_ts))):
+            if resolution != HOUR:
+                continue
+            first, _ = month_layout(key, HOUR)
+            for i, tokens in enumerate(values):
+                if tokens and first_bucket <= first + i < last_bucket:
+                    totals[first + i] = tokens
+        return totals
+
+    def days(self, first_day, last_day):
+        """[first_day, last_day] 날짜별 {date: 토큰} (로컬 날짜)"""
+        totals = {}
+        for key, resolution, values in self._months(month_key(first_day), month_key(last_day)):
+            first, _ = month_layout(key, resolution)
+            for i, tokens in enumerate(values):
+                if not tokens:
+                    continue
+                if resolution == HOUR:
+                    day = datetime.fromtimestamp((first + i) * HOUR).date()
+                else:
+                    day = date.fromordinal(first + i)
+                if first_day <= day <= last_day:
+                    totals[day] = totals.get(day, 0) + tokens
+        return totals
+
+    def history(self, step="day", periods=None, now=None):
+        """최근 periods개 구간 [(구간 시작 naive 로컬 datetime, 토큰)] - 오래된 것부터, 마지막이 지금 구간
+
+        step: hour / day / week (월요일 시작) / month
+        """
+        periods = periods or HISTORY_PERIODS[step]
+        now = now or datetime.now()
+        if step == "hour":
+            current = now.replace(minute=0, second=0, microsecond=0)
+            starts = [current - timedelta(hours=n) for n in range(periods - 1, -1, -1)]
+            totals = self.hours(starts[0].timestamp(), now.timestamp() + HOUR)
+            return [(start, totals.get(int(start.timestamp()) // HOUR, 0)) for start in starts]
+
+        today = now.date()
+        if step == "day":
+            starts = [today - timedelta(days=n) for n in range(periods - 1, -1, -1)]
+        elif step == "week":
+            monday = today - timedelta(days=today.weekday())
+            starts = [monday - timedelta(weeks=n) for n in range(periods - 1, -1, -1)]
+        else:
+            key = month_key(today)
+            starts = [month_start(k).date() for k in range(key - periods + 1, key + 1)]
+
+        totals = [0] * len(starts)
+        slot = 0
+        for day, tokens in sorted(self.days(starts[0], today).items()):
+            while slot + 1 < len(starts) and day >= starts[slot + 1]:
+                slot += 1
+            totals[slot] += tokens
+        return [(datetime.combine(start, datetime.min.time()), total) for start, total in zip(starts, totals)]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,68 @@
+"""5시간 과금 블록(세션) 계산"""
+
+
+class SessionBlock:
+    """하나의 세션 블록 - [start, end) 구간, 블록 안 첫/마지막 활동 시각 (모두 epoch 초)"""
+
+    __slots__ = ("start", "end", "first_ts", "last_ts")
+
+    def __init__(self, start, end, first_ts, last_ts):
+        self.start = start
+        self.end = end
+        self.first_ts = first_ts
+        self.last_ts = last_ts
+
+    def is_active(self, now_ts):
+        return self.start <= now_ts < self.end
+
+
+def split_blocks(minutes, block_seconds, block=None):
+    """활동이 있는 분 버킷 목록(오름차순)을 블록으로 나눔 → [SessionBlock]
+
+    - 블록은 첫 활동 시각을 정시로 내린 시점에 시작해서 block_seconds 뒤에 끝남
+    - 블록이 끝난 뒤 처음 활동이 새 블록을 시작 (사이에 빈 시간이 있으면 그만큼 블록 없음)
+    - block이 주어지면 그 블록에 이어서 계산 (증분 갱신용)
+    """
+    blocks = [block] if block is not None else []
+    for minute in minutes:
+        ts = minute * 60
+        if block is not None and ts < block.end:
+            if ts >= block.start:
+                block.last_ts = max(block.last_ts, ts)
+            continue
+        start = ts - ts % 3600
+        block = SessionBlock(start, start + block_seconds, ts, ts)
+        blocks.append(block)
+    return blocks
+
+
+class SessionBlockTracker:
+    """분 롤업에서 현재 세션 블록을 찾는 추적기 (매 틱 마지막 블록 이후 분 버킷만 봄)
+
+    블록 경계는 앞 블록에 따라 정해지므로 마지막으로 확정된 블록부터 이어서 계산하고,
+    그보다 이른 시각의 메시지가 새로 들어오면(뒤늦게 읽힌 파일 등) 처음부터 다시 계산
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.block = None
+        self.block_seconds = None
+
+    def current(self, now_ts, history_start_ts, block_seconds):
+        """now_ts에 진행 중인 SessionBlock 또는 None"""
+        changed_ts = self.index.take_min_changed_ts()
+        if (self.block is None or block_seconds != self.block_seconds
+                or (changed_ts is not None and changed_ts < self.block.start)):
+            self.block = None
+            self.block_seconds = block_seconds
+            since_ts = history_start_ts
+        else:
+            since_ts = self.block.start
+
+        minutes = self.index.active_minutes(since_ts)
+        blocks = split_blocks(minutes, block_seconds, self.block)
+        if blocks:
+            self.block = blocks[-1]
+        if self.block is not None and self.block.is_active(now_ts):
+            return self.block
+        return None
@@ -0,0 +1,81 @@
+"""프로젝트 / 세션 파일 / 모델별 사용량 분해"""
+
+import os
+
+GROUP_KEYS = ("project", "session", "model")
+
+
+def format_tokens(n):
+    """토큰 수 짧게 (950 / 12.3k / 1.2M)"""
+    if n >= 1_000_000:
+        return f"{n / 1_000_000:.1f}M"
+    if n >= 1000:
+        return f"{n / 1000:.1f}k"
+    return str(n)
+
+
+class UsageBreakdown:
+    """윈도우 안 사용량을 프로젝트(로그 폴더) / 세션 파일 / 모델별로 나눈 표
+
+    행은 (project, session, model, input, output, cache_creation, cache_read, messages).
+    인덱스에 이미 들어간 메시지를 GROUP BY 한 결과라 로그를 다시 읽지 않음
+    """
+
+    FIELDS = ("input", "output", "cache_creation", "cache_read", "messages")
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+
+    @classmethod
+    def from_index(cls, index, projects_dir, since_ts):
+        root = str(projects_dir) + os.sep
+        rows = []
+        for path, model, *totals in index.breakdown_since(since_ts):
+            if path.startswith("@"):
+                # 다른 PC에서 가져온 메시지 ("@PC ID") - 프로젝트 대신 PC 단위로만 보임
+                rows.append((path, "", model or "unknown", *totals))
+                continue
+            # projects/<프로젝트>/<세션>.jsonl (하위 폴더가 더 있어도 첫 폴더가 프로젝트)
+            relative = path[len(root):] if path.startswith(root) else os.path.basename(path)
+            parts = relative.split(os.sep)
+            project = parts[0] if len(parts) > 1 else ""
+            session = os.path.splitext(parts[-1])[0]
+            rows.append((project, session, model or "unknown", *totals))
+        return cls(rows)
+
+    def group(self, key):
+        """key(project/session/model)별 합계 → [(이름, input, output, cache_creation, cache_read, messages)]
+
+        input + output 많은 순 (세션/주간 한도 계산과 같은 기준)
+        """
+        column = GROUP_KEYS.index(key)
+        groups = {}
+        for row in self.rows:
+            totals = groups.setdefault(row[column], [0] * len(self.FIELDS))
+            for i, value in enumerate(row[3:]):
+                totals[i] += value
+        result = [(name, *totals) for name, totals in groups.items()]
+        result.sort(key=lambda item: item[1] + item[2], reverse=True)
+        return result
+
+    def to_dict(self):
+        """JSON 출력용 dict"""
+        return {
+            key + "s": [dict(zip(("name",) + self.FIELDS, item)) for item in self.group(key)]
+            for key in GROUP_KEYS
+        }
+
+    def format_lines(self, key, limit=5, compact=False):
+        """패널 / CLI 출력용 줄 목록 (compact면 좁은 위젯용으로 이름을 줄이고 캐시는 뺌)"""
+        width = 12 if compact else 18
+        lines = []
+        for name, input_tokens, output_tokens, cache_creation, cache_read, _messages in self.group(key)[:limit]:
+            if key == "session":
+                name = name[:8]
+            elif len(name) > width:
+                name = "…" + name[-(width - 1):]
+            line = f"{name:<{width}} in {format_tokens(input_tokens)} · out {format_tokens(output_tokens)}"
+            if not compact:
+                line += f" · cache {format_tokens(cache_creation)}/{format_tokens(cache_read)}"
+            lines.append(line)
+        return lines
@@ -0,0 +1,132 @@
+"""claude-usage CLI - GUI 없이 세션/주간 사용량 출력 (cron, 상태줄, 프로파일링용)
+
+사용법: python -m claude_usage [--json] [--breakdown] [--metrics] [--claude-dir DIR] [--cache-dir DIR] [--workers N]
+       python -m claude_usage --serve [--host HOST] [--port PORT]   # 상주하면서 /usage, /metrics 제공
+       python -m claude_usage --history {hour,day,week,month} [--periods N]   # 지난 사용량 기록
+"""
+
+import argparse
+import json
+from datetime import datetime, timezone
+
+from .archive import HISTORY_PERIODS
+from .breakdown import format_tokens
+from .engine import UsageEngine
+from .forecast import format_limit_eta
+from .ingest import JsonlIngester
+from .server import DEFAULT_HOST, DEFAULT_PORT, UsageDaemon
+
+
+def format_remaining(reset_time, now=None):
+    """리셋까지 남은 시간 문자열 ("2시간 10분") 또는 None"""
+    if reset_time is None:
+        return None
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    seconds = (reset_time - now).total_seconds()
+    if seconds <= 0:
+        return "곧"
+    return f"{int(seconds // 3600)}시간 {int((seconds % 3600) // 60)}분"
+
+
+def format_forecast(forecast):
+    """현재 속도 기준 예측 한 줄"""
+    if forecast is None or forecast.session_eta is None and forecast.weekly_eta is None:
+        return "속도: 최근 사용 없음"
+    parts = [f"속도: 분당 {forecast.rate:,.0f} tokens"]
+    if forecast.session_hits_limit:
+        pace = "지금 속도면 " if forecast.session_eta > 0 else ""
+        parts.append(f"{pace}세션 {format_limit_eta(forecast.session_eta)}")
+    if forecast.weekly_hits_limit:
+        parts.append(f"주간 {format_limit_eta(forecast.weekly_eta)}")
+    if len(parts) == 1:
+        parts.append("리셋 전엔 한도에 안 닿을 페이스")
+    return " | ".join(parts)
+
+
+def format_text(snapshot):
+    """사람이 읽는 텍스트 출력"""
+    remaining = format_remaining(snapshot.session_reset_time)
+    reset = f" | {remaining} 후 리셋" if remaining else " | 세션 없음"
+    return "\n".join([
+        f"세션 ({snapshot.session_hours}시간): {snapshot.session_tokens:,} / {snapshot.session_limit:,} tokens"
+        f" ({snapshot.session_percent:.1f}%){reset}",
+        f"주간: {snapshot.weekly_tokens:,} / {snapshot.weekly_limit:,} tokens ({snapshot.weekly_percent:.1f}%)",
+        format_forecast(snapshot.forecast),
+    ])
+
+
+def format_history(history, step):
+    """기록 막대 그래프 (구간마다 한 줄)"""
+    label_format = {"hour": "%m-%d %H시", "day": "%m-%d (%a)", "week": "%Y-%m-%d 주", "month": "%Y-%m"}[step]
+    peak = max((tokens for _, tokens in history), default=0) or 1
+    return "\n".join(
+        f"{start.strftime(label_format):<13} {'█' * round(tokens / peak * 30):<30} {format_tokens(tokens)}"
+        for start, tokens in history
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="claude-usage", description="Claude Code 로컬 사용량 (세션/주간)")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    parser.add_argument("--breakdown", action="store_true", help="프로젝트 / 세션 / 모델별 사용량도 출력")
+    parser.add_argument("--metrics", action="store_true", help="스캔 단계별 시간 / 카운터도 출력")
+    parser.add_argument("--claude-dir", help="~/.claude 대신 사용할 폴더")
+    parser.add_argument("--cache-dir", help="인덱스 캐시 폴더")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="파싱 프로세스 수 (새로 읽을 양이 많을 때만 사용, 기본: 1)")
+    parser.add_argument("--io-concurrency", type=int, default=JsonlIngester.IO_CONCURRENCY,
+                        help=f"동시에 읽는 파일 수 (느린 네트워크 / 로밍 폴더용, 1이면 한 파일씩, 기본: {JsonlIngester.IO_CONCURRENCY})")
+    parser.add_argument("--sync-dir", help="여러 PC 사용량을 합칠 동기화 폴더 (Dropbox, OneDrive 등)")
+    parser.add_argument("--history", choices=tuple(HISTORY_PERIODS),
+                        help="장기 보관소의 지난 사용량 (처음 한 번은 예전 로그를 전부 읽어서 채움)")
+    parser.add_argument("--periods", type=int, help="--history 구간 수 (기본: 시간 48 / 일 30 / 주 12 / 월 12)")
+    parser.add_argument("--serve", action="store_true",
+                        help="종료할 때까지 증분 갱신하면서 HTTP로 /usage (JSON), /metrics (Prometheus) 제공")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"--serve 주소 (기본: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"--serve 포트 (기본: {DEFAULT_PORT})")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    engine = UsageEngine(claude_dir=args.claude_dir, cache_dir=args.cache_dir, workers=args.workers,
+                         sync_dir=args.sync_dir, io_concurrency=args.io_concurrency)
+    if args.serve:
+        daemon = UsageDaemon(engine, args.host, args.port)
+        print(f"http://{args.host}:{args.port}/usage | /metrics (Ctrl+C로 종료)", flush=True)
+        try:
+            daemon.run()
+        finally:
+            engine.close()
+        return 0
+
+    try:
+        snapshot = engine.scan(breakdown=args.breakdown)
+        history = engine.get_history(args.history, args.periods) if args.history else None
+    finally:
+        engine.close()
+
+    if args.json:
+        result = snapshot.to_dict()
+        if args.breakdown:
+            result["breakdown"] = {
+                "session": snapshot.session_breakdown.to_dict(),
+                "weekly": snapshot.weekly_breakdown.to_dict(),
+            }
+        if args.metrics:
+            result["metrics"] = snapshot.metrics.to_dict()
+        if history is not None:
+            result["history"] = [{"start": start.isoformat(), "tokens": tokens} for start, tokens in history]
+        print(json.dumps(result, ensure_ascii=False))
+    else:
+        print(format_text(snapshot))
+        if args.breakdown:
+            for key, title in (("project", "프로젝트"), ("model", "모델"), ("session", "세션")):
+                print(f"\n[주간 {title}별]")
+                print("\n".join(snapshot.weekly_breakdown.format_lines(key)) or "(없음)")
+        if args.metrics:
+            print("\n".join(snapshot.metrics.format_lines()))
+        if history is not None:
+            print(f"\n[기록 ({args.history})]")
+            print(format_history(history, args.history))
+    return 0
@@ -0,0 +1,101 @@
+"""메모리 절약형 메시지 중복 제거 저장소
+
+스캔 경로의 중복 제거는 SQLite 인덱스(messages rowid = hash_key, 최대값 UPSERT)가 맡음.
+DedupStore는 인덱스 없이 로그를 통째로 읽는 예전 경로(get_tokens_from_jsonl)와 벤치마크용.
+"""
+
+import hashlib
+from array import array
+from bisect import bisect_left
+
+
+def hash_key(key):
+    """메시지 키(문자열) → 부호 있는 64비트 정수 ID (SQLite INTEGER에 그대로 들어감)"""
+    digest = hashlib.blake2b(key.encode("utf-8", "surrogatepass"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+class DedupStore:
+    """64비트 해시 ID를 정렬된 array에 담는 중복 제거 저장소 (항목당 24바이트)
+
+    - 최대값 기준 (ID 없는 메시지는 keep_first=True로 처음 것만)
+    - 새 항목은 작은 dict 버퍼에 모았다가 커지면 정렬 배열로 병합
+    """
+
+    MIN_BUFFER = 4096
+
+    def __init__(self):
+        self._ids = array("q")
+        self._ts = array("d")
+        self._tokens = array("q")
+        self._buffer = {}  # id -> (ts, tokens)
+        self.hits = 0      # 중복이라 버려진 횟수
+
+    def __len__(self):
+        return len(self._ids) + len(self._buffer)
+
+    def _find(self, msg_id):
+        i = bisect_left(self._ids, msg_id)
+        if i < len(self._ids) and self._ids[i] == msg_id:
+            return i
+        return -1
+
+    def values(self):
+        """저장된 토큰 값들 (dict.values()처럼 sum()에 바로 씀)"""
+        yield from self._tokens
+        for _ts, tokens in self._buffer.values():
+            yield tokens
+
+    def get(self, msg_id):
+        """(ts, tokens) 또는 None"""
+        i = self._find(msg_id)
+        if i >= 0:
+            return self._ts[i], self._tokens[i]
+        return self._buffer.get(msg_id)
+
+    def offer(self, msg_id, ts, tokens, keep_first=False):
+        """저장해야 할 값이면 True (처음 보는 ID이거나 최대값 갱신), 중복이면 False"""
+        i = self._find(msg_id)
+        if i >= 0:
+            if keep_first or self._tokens[i] >= tokens:
+                self.hits += 1
+                return False
+            self._ts[i] = ts
+            self._tokens[i] = tokens
+            return True
+
+        prev = self._buffer.get(msg_id)
+        if prev is not None and (keep_first or prev[1] >= tokens):
+            self.hits += 1
+            return False
+        self._buffer[msg_id] = (ts, tokens)
+        # 배열 크기에 비례해서 병합 → 병합 비용 분할 상환
+        if len(self._buffer) >= max(self.MIN_BUFFER, len(self._ids) // 8):
+            self._merge()
+        return True
+
+    def _merge(self):
+        """버퍼를 정렬 배열로 병합
+
+        전체를 튜플 목록으로 만들어 다시 정렬하지 않고, 정렬한 버퍼 순서대로 기존 배열의 구간을
+        잘라 붙이는 식으로 한 번에 훑음 → 최대 메모리는 기존 배열 + 새 배열 + 버퍼 정도
+        (버퍼 ID는 offer()에서 기존 배열에 없는 걸 확인했으므로 겹치지 않음)
+        """
+        old_ids, old_ts, old_tokens = self._ids, self._ts, self._tokens
+        ids, ts, tokens = array("q"), array("d"), array("q")
+        start = 0
+        for msg_id, (entry_ts, entry_tokens) in sorted(self._buffer.items()):
+            end = bisect_left(old_ids, msg_id, start)
+            if end > start:
+                ids.extend(old_ids[start:end])
+                ts.extend(old_ts[start:end])
+                tokens.extend(old_tokens[start:end])
+                start = end
+            ids.append(msg_id)
+            ts.append(entry_ts)
+            tokens.append(entry_tokens)
+        ids.extend(old_ids[start:])
+        ts.extend(old_ts[start:])
+        tokens.extend(old_tokens[start:])
+        self._ids, self._ts, self._tokens = ids, ts, tokens
+        self._buffer = {}
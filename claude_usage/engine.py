@@ -0,0 +1,369 @@
+"""헤드리스 사용량 엔진 - GUI 없이 import / 벤치마크 / CLI로 쓰는 스캔 로직"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from .archive import UsageArchive
+from .blocks import SessionBlockTracker
+from .breakdown import UsageBreakdown
+from .dedup import DedupStore, hash_key
+from .forecast import UsageForecast, ewma_rate, seconds_to_limit
+from .index import UsageIndex
+from .ingest import JsonlIngester
+from .manifest import DirectoryManifest
+from .metrics import ScanMetrics
+from .parsing import LineScanner, format_iso_utc, parse_usage_line
+from .plan import PLAN_LIMITS, WEEKLY_LIMITS, get_plan_tier, load_plan_info
+from .sync import SnapshotSync, load_machine_id
+
+APP_NAME = "ClaudeUsageWidget"
+
+
+def default_cache_dir():
+    """인덱스 캐시 폴더 (Windows: %LOCALAPPDATA%, 그 외: ~/.cache)"""
+    return Path(os.environ.get("LOCALAPPDATA") or Path.home() / ".cache") / APP_NAME
+
+
+def utc_naive(ts):
+    """epoch 초 → naive UTC datetime (None은 그대로)"""
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None)
+
+
+class UsageSnapshot:
+    """한 번의 스캔 결과 (현재 세션 블록/주간 토큰 + 블록 시작·첫 메시지 시각 + 계측 + 분해표 + 예측)"""
+
+    def __init__(self, session_tokens=0, weekly_tokens=0, first_message_time=None, scanned_at=None,
+                 session_limit=PLAN_LIMITS["pro"], weekly_limit=WEEKLY_LIMITS["pro"], session_hours=5,
+                 metrics=None, session_start=None, weekly_reset_time=None):
+        self.session_tokens = session_tokens
+        self.weekly_tokens = weekly_tokens
+        self.first_message_time = first_message_time  # naive UTC datetime 또는 None
+        # 진행 중인 세션 블록 시작 (naive UTC, 없으면 첫 메시지 시각으로 대신함)
+        self.session_start = session_start or first_message_time
+        self.weekly_reset_time = weekly_reset_time  # 다음 주 월요일 0시 (로컬, aware) 또는 None
+        self.scanned_at = scanned_at or datetime.now()
+        self.session_limit = session_limit
+        self.weekly_limit = weekly_limit
+        self.session_hours = session_hours
+        self.metrics = metrics  # ScanMetrics 또는 None
+        # scan(breakdown=True)일 때만 채워지는 UsageBreakdown
+        self.session_breakdown = None
+        self.weekly_breakdown = None
+        self.forecast = None  # UsageForecast 또는 None
+
+    @property
+    def session_percent(self):
+        return min(100, (self.session_tokens / self.session_limit) * 100)
+
+    @property
+    def weekly_percent(self):
+        return min(100, (self.weekly_tokens / self.weekly_limit) * 100)
+
+    @property
+    def session_reset_time(self):
+        """세션 리셋 시각 (블록 시작 + 세션 길이, naive UTC) 또는 None"""
+        if self.session_start is None:
+            return None
+        return self.session_start + timedelta(hours=self.session_hours)
+
+    def to_dict(self):
+        """JSON 출력용 dict"""
+        def iso(dt):
+            return dt.strftime("%Y-%m-%dT%H:%M:%SZ") if dt is not None else None
+
+        return {
+            "session_tokens": self.session_tokens,
+            "session_limit": self.session_limit,
+            "session_percent": round(self.session_percent, 1),
+            "session_start": iso(self.session_start),
+            "session_reset_time": iso(self.session_reset_time),
+            "weekly_tokens": self.weekly_tokens,
+            "weekly_limit": self.weekly_limit,
+            "weekly_percent": round(self.weekly_percent, 1),
+            "weekly_reset_time": (self.weekly_reset_time.isoformat(timespec="seconds")
+                                  if self.weekly_reset_time is not None else None),
+            "first_message_time": iso(self.first_message_time),
+            "scanned_at": self.scanned_at.isoformat(timespec="seconds"),
+            "forecast": self.forecast.to_dict() if self.forecast is not None else None,
+        }
+
+
+class UsageEngine:
+    """~/.claude/projects JSONL 로그를 로컬 인덱스에 증분 수집하고 세션/주간 합계를 계산"""
+
+    # 주간 윈도우보다 이만큼(초) 앞부터 수집 - 주 경계에 걸친 세션 블록용 (세션 길이보다 길어야 함)
+    BLOCK_LOOKBACK = 86400
+
+    def __init__(self, claude_dir=None, cache_dir=None, session_hours=5, workers=1,
+                 parallel_threshold=JsonlIngester.PARALLEL_THRESHOLD, sync_dir=None,
+                 io_concurrency=JsonlIngester.IO_CONCURRENCY):
+        self.claude_dir = Path(claude_dir) if claude_dir else Path.home() / ".claude"
+        self.projects_dir = self.claude_dir / "projects"
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.session_hours = session_hours
+
+        # 플랜 정보 로드
+        self.plan_type, self.rate_tier = load_plan_info(self.claude_dir)
+        self.plan_tier = get_plan_tier(self.plan_type, self.rate_tier)
+        self.session_limit = PLAN_LIMITS[self.plan_tier]
+        self.weekly_limit = WEEKLY_LIMITS[self.plan_tier]
+
+        self.index = UsageIndex(self.cache_dir / "usage_index.sqlite3")
+        self.ingester = JsonlIngester(self.index, workers, parallel_threshold, io_concurrency)
+        self.manifest = DirectoryManifest(self.index)
+        # 위젯 / 데몬이 붙여 주는 DirectoryWatcher - 감시가 돌고 있으면 기존 파일 append는 이벤트로 들어오므로
+        # 전체 재스캔 때 윈도우 밖 휴면 파일은 stat 안 함 (첫 walk는 항상 전부)
+        self.watcher = None
+        self.blocks = SessionBlockTracker(self.index)
+        # 윈도우 밖 기록은 인덱스에서 정리되므로 시간별 합계만 압축해서 따로 보관
+        self.archive = UsageArchive(self.cache_dir / "usage_history.sqlite3")
+        # sync_dir이 있으면 다른 PC 사용량도 합침 (동기화 폴더로 스냅샷 세그먼트 교환)
+        self.sync = None
+        if sync_dir:
+            self.sync = SnapshotSync(self.index, sync_dir, load_machine_id(self.cache_dir))
+
+    def is_watched(self):
+        """폴더 감시가 실제로 돌고 있는지 (감시 스레드가 모드를 정한 뒤부터 True)"""
+        return self.watcher is not None and self.watcher.mode is not None
+
+    def get_tokens_from_jsonl(self, filepath, since_time=None, msg_tokens=None, metrics=None):
+        """JSONL 파일에서 토큰 사용량 추출 (메시지 ID 기준 중복 제거, 인덱스 없이 전체 파싱)
+
+        msg_tokens는 DedupStore(기본값) 또는 키 문자열 → 토큰 dict
+        metrics(ScanMetrics)가 있으면 스캔 경로와 같은 기준으로 읽은 바이트 / 줄 수를 셈
+        """
+        if msg_tokens is None:
+            msg_tokens = DedupStore()
+        compact = isinstance(msg_tokens, DedupStore)
+
+        since_ts = None
+        if since_time is not None:
+            # naive면 UTC로 봄 (예전 호출 방식)
+            since_ts = (since_time if since_time.tzinfo else since_time.replace(tzinfo=timezone.utc)).timestamp()
+        # 텍스트 모드로 줄마다 디코딩하지 않고, 바이너리 청크에서 사전 필터를 통과한 줄만 json으로
+        scanner = LineScanner(format_iso_utc(since_ts) if since_ts is not None else None)
+        parsed = 0
+        try:
+            with open(filepath, "rb") as f:
+                for line in scanner.lines_to_end(f):
+                    parsed += 1
+                    record = parse_usage_line(line, filepath)
+                    if record is None:
+                        continue
+                    msg_key, ts, input_tokens, output_tokens = record[:4]
+
+                    # 타임스탬프 필터링
+                    if since_ts is not None and ts is not None and ts < since_ts:
+                        continue
+
+                    # Claude Code 사용량 = input + output tokens
+                    total_tokens = input_tokens + output_tokens
+                    has_id = not msg_key.startswith(f"{filepath}_")
+                    if compact:
+                        # 해시 ID로 저장 (ID 없는 메시지는 처음 것만)
+                        msg_tokens.offer(hash_key(msg_key), ts or 0.0, total_tokens, keep_first=not has_id)
+                    elif not has_id:
+                        # ID 없는 메시지는 처음 것만 유지
+                        if msg_key not in msg_tokens:
+                            msg_tokens[msg_key] = total_tokens
+                    elif msg_key not in msg_tokens or msg_tokens[msg_key] < total_tokens:
+                        # 메시지 ID 기준 중복 제거 (최대값만 저장)
+                        msg_tokens[msg_key] = total_tokens
+        except Exception:
+            pass
+        if metrics is not None:
+            metrics.files_opened += 1
+            metrics.bytes_read += scanner.bytes_read
+            metrics.lines_parsed += parsed
+            metrics.lines_skipped += scanner.skipped
+        return msg_tokens
+
+    def get_week_start(self):
+        """이번 주 월요일 0시 (로컬 시간대, aware) - 위젯의 주간 리셋 표시와 같은 기준"""
+        now = datetime.now()
+        monday = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+        # 날짜 계산은 naive 로컬로 하고 마지막에 붙여야 서머타임 바뀌는 주에도 오프셋이 맞음
+        return monday.astimezone()
+
+    def get_week_reset(self):
+        """다음 주 월요일 0시 (로컬 시간대, aware)"""
+        return (self.get_week_start().replace(tzinfo=None) + timedelta(days=7)).astimezone()
+
+    def scan(self, paths=None, cancel=None, session_hours=None, breakdown=False):
+        """트리를 한 번만 돌면서 세션/주간 사용량과 세션 첫 메시지 시각을 함께 계산
+
+        paths가 주어지면 트리를 돌지 않고 해당 파일만 증분 수집 (빈 집합이면 윈도우만 재계산)
+        cancel()이 True를 반환하면 파일 경계에서 중단하고 None 반환
+        breakdown=True면 같은 인덱스에서 프로젝트/세션/모델별 분해표도 채움
+        """
+        session_hours = session_hours or self.session_hours
+
+        # 모두 epoch 초로 비교 (jsonl 타임스탬프는 UTC, 주 경계는 로컬 월요일)
+        now = datetime.now(timezone.utc)
+        week_since_ts = self.get_week_start().timestamp()
+        # 월요일 직전에 시작해서 주 경계에 걸친 세션 블록도 제대로 잡히게 하루 앞부터 수집
+        # (주간 합계는 tokens_since(week_since_ts)라 그대로)
+        ingest_since_ts = week_since_ts - self.BLOCK_LOOKBACK
+
+        metrics = ScanMetrics()
+        if not self.projects_dir.exists():
+            return self.make_snapshot(0, 0, None, session_hours, metrics)
+
+        # 수집 윈도우(주간 + 하루)가 세션 윈도우를 포함하므로 그 기준으로만 거름
+        with metrics.phase("walk"):
+            if paths is None:
+                # 디렉터리 목록 캐시로 바뀐 폴더만 scandir (안 바뀐 파일은 파싱 안 함)
+                files, live_paths = self.manifest.walk(self.projects_dir, ingest_since_ts, metrics,
+                                                        skip_dormant=self.is_watched())
+            else:
+                live_paths = None
+                files = []
+                for path in paths:
+                    metrics.files_stated += 1
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    if st.st_mtime >= ingest_since_ts:
+                        files.append((path, st))
+
+            tasks = []
+            for jsonl_file, st in files:
+                task = self.ingester.plan(jsonl_file, st)
+                if task is not None:
+                    tasks.append(task)
+
+        with metrics.phase("ingest"):
+            if not self.ingester.run(tasks, ingest_since_ts, cancel, metrics):
+                # 파일 단위로 반영되는 상태라 여기까지 읽은 건 저장해 둠
+                self.index.commit()
+                return None
+
+        if self.sync is not None:
+            with metrics.phase("sync"):
+                self.sync.run(ingest_since_ts)
+
+        with metrics.phase("archive"):
+            # 수집 윈도우 밖 메시지는 수집하지 않으니 그 앞 시간 버킷은 더 바뀌지 않음
+            self.archive.update(self.index, ingest_since_ts)
+
+        with metrics.phase("commit"):
+            self.index.prune(ingest_since_ts, live_paths)
+            self.index.commit()
+
+        # 진행 중인 세션 블록 (분 롤업에서 마지막 블록 이후만 봄)
+        with metrics.phase("blocks"):
+            # 월요일 직전에 시작한 블록도 이어지도록 수집 윈도우 시작(하루 전)부터
+            block = self.blocks.current(now.timestamp(), ingest_since_ts, session_hours * 3600)
+
+        # 인덱스 범위 쿼리로 윈도우 합계 계산
+        with metrics.phase("query"):
+            session_tokens, first_ts, session_since_ts = 0, None, now.timestamp()
+            if block is not None:
+                session_since_ts = block.start
+                session_tokens, first_ts = self.index.tokens_since(block.start)
+            weekly_tokens, _ = self.index.tokens_since(week_since_ts)
+        snapshot = self.make_snapshot(session_tokens, weekly_tokens, utc_naive(first_ts), session_hours, metrics,
+                                      utc_naive(block.start if block is not None else None))
+        with metrics.phase("forecast"):
+            snapshot.forecast = self.make_forecast(snapshot, now.timestamp())
+        if breakdown:
+            with metrics.phase("breakdown"):
+                snapshot.session_breakdown = UsageBreakdown.from_index(
+                    self.index, self.projects_dir, session_since_ts)
+                snapshot.weekly_breakdown = UsageBreakdown.from_index(
+                    self.index, self.projects_dir, week_since_ts)
+        return snapshot
+
+    def make_forecast(self, snapshot, now_ts):
+        """분 롤업 최근 한 시간으로 현재 속도를 구해서 세션/주간 한도 도달 예측 (로그 재스캔 없음)"""
+        rate = ewma_rate(self.index.minute_series(now_ts - 3600 - 60), now_ts)
+        # 진행 중인 세션 블록이 없으면 세션 쪽은 예측 안 함 (다음 메시지가 새 블록을 시작)
+        session_eta = session_reset = None
+        if snapshot.session_reset_time is not None:
+            session_eta = seconds_to_limit(snapshot.session_tokens, snapshot.session_limit, rate)
+            session_reset = snapshot.session_reset_time.replace(tzinfo=timezone.utc).timestamp() - now_ts
+        weekly_reset = snapshot.weekly_reset_time.timestamp() - now_ts
+        return UsageForecast(
+            rate,
+            session_eta, session_reset,
+            seconds_to_limit(snapshot.weekly_tokens, snapshot.weekly_limit, rate), weekly_reset,
+        )
+
+    def make_snapshot(self, session_tokens, weekly_tokens, first_time, session_hours, metrics=None,
+                      session_start=None):
+        return UsageSnapshot(
+            session_tokens, weekly_tokens, first_time,
+            session_limit=self.session_limit,
+            weekly_limit=self.weekly_limit,
+            session_hours=session_hours,
+            metrics=metrics,
+            session_start=session_start,
+            weekly_reset_time=self.get_week_reset(),
+        )
+
+    def get_usage_since(self, hours=5):
+        """최근 hours시간 동안의 사용량 (중복 제거, 세션 블록과 무관한 롤링 윈도우)"""
+        self.scan()
+        since_ts = datetime.now(timezone.utc).timestamp() - hours * 3600
+        return self.index.tokens_since(since_ts)[0]
+
+    def get_weekly_usage(self):
+        """이번 주 월요일부터의 사용량 계산 (중복 제거)"""
+        return self.scan().weekly_tokens
+
+    def get_usage_breakdown(self, hours=None):
+        """프로젝트/세션/모델별 분해표 (hours가 없으면 이번 주, 있으면 최근 hours시간)"""
+        snapshot = self.scan(breakdown=True)
+        if not hours:
+            return snapshot.weekly_breakdown
+        since_ts = datetime.now(timezone.utc).timestamp() - hours * 3600
+        return UsageBreakdown.from_index(self.index, self.projects_dir, since_ts)
+
+    def backfill_history(self, cancel=None):
+        """주간 윈도우 밖 예전 로그까지 전부 읽어서 장기 보관소를 채움 → 끝까지 했으면 True
+
+        본 인덱스를 건드리지 않도록 임시 인덱스에 수집하고, 중단되면 다음에 거기서 이어서 읽음
+        """
+        path = self.cache_dir / "history_backfill.sqlite3"
+        index = UsageIndex(path)
+        try:
+            if self.projects_dir.exists():
+                files, _ = DirectoryManifest(index).walk(self.projects_dir, 0)
+                ingester = JsonlIngester(index, self.ingester.workers, self.ingester.parallel_threshold,
+                                         self.ingester.io_concurrency)
+                tasks = [task for task in (ingester.plan(p, st) for p, st in files) if task is not None]
+                done = ingester.run(tasks, None, cancel)
+                index.commit()
+                if not done:
+                    return False
+            self.archive.update(index, 0)
+            self.archive.set_meta("backfilled", datetime.now(timezone.utc).timestamp())
+        finally:
+            index.close()
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(str(path) + suffix)
+            except OSError:
+                pass
+        return True
+
+    def get_history(self, step="day", periods=None, cancel=None):
+        """장기 보관소에서 최근 periods개 구간 사용량 [(구간 시작, 토큰)] (step: hour/day/week/month)
+
+        처음 한 번은 예전 로그로 보관소를 채우고 나서 계산 (중단되면 None)
+        """
+        if self.archive.get_meta("backfilled") is None and not self.backfill_history(cancel):
+            return None
+        return self.archive.history(step, periods)
+
+    def get_first_message_time(self):
+        """진행 중인 세션 블록의 첫 메시지 시각 (naive UTC) 또는 None"""
+        return self.scan().first_message_time
+
+    def close(self):
+        self.index.close()
+        self.archive.close()
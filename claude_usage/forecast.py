@@ -0,0 +1,88 @@
+"""사용 속도(burn rate) 기반 한도 도달 예측"""
+
+import math
+
+# 이 속도(분당 토큰)보다 느리면 사실상 안 쓰는 중으로 보고 예측 안 함
+MIN_RATE = 1.0
+
+
+def ewma_rate(series, now_ts, half_life=10, lookback=60):
+    """분 롤업 [(분 버킷, 토큰)]으로 최근 속도(분당 토큰)의 지수 가중 평균
+
+    지금 쓰이고 있는 분은 덜 찼으니 빼고, 직전 lookback분을 빈 분(0)까지 포함해서
+    반감기 half_life분으로 가중 → 쉬기 시작하면 금방 0으로 떨어지고 몰아 쓰면 바로 올라감
+    """
+    current = int(now_ts // 60)
+    tokens = dict(series)
+    weighted = 0.0
+    weights = 0.0
+    for age in range(1, lookback + 1):
+        weight = 0.5 ** ((age - 1) / half_life)
+        weighted += weight * tokens.get(current - age, 0)
+        weights += weight
+    return weighted / weights
+
+
+def seconds_to_limit(used, limit, rate):
+    """rate(분당 토큰)로 계속 쓰면 한도까지 남은 초 (이미 넘었으면 0, 안 쓰는 중이면 None)"""
+    if used >= limit:
+        return 0
+    if rate < MIN_RATE:
+        return None
+    return (limit - used) / rate * 60
+
+
+def format_eta(seconds):
+    """예측 시간 짧게 (~42분 / ~3시간 10분 / ~2일)"""
+    minutes = max(1, int(math.ceil(seconds / 60)))
+    if minutes < 60:
+        return f"~{minutes}분"
+    if minutes < 48 * 60:
+        return f"~{minutes // 60}시간 {minutes % 60}분"
+    return f"~{minutes // (24 * 60)}일"
+
+
+def format_limit_eta(seconds):
+    """한도 도달 예측 문구 (이미 넘었으면 "한도 도달", 아니면 "한도까지 ~42분")"""
+    if seconds <= 0:
+        return "한도 도달"
+    return f"한도까지 {format_eta(seconds)}"
+
+
+class UsageForecast:
+    """현재 속도 기준 세션/주간 한도 도달 예측 (모두 스캔 시점 기준 초)
+
+    *_eta: 한도까지 남은 초 (None이면 지금 속도로는 안 닿음), *_reset: 리셋까지 남은 초
+    """
+
+    def __init__(self, rate, session_eta, session_reset, weekly_eta, weekly_reset):
+        self.rate = rate  # 분당 토큰
+        self.session_eta = session_eta
+        self.session_reset = session_reset
+        self.weekly_eta = weekly_eta
+        self.weekly_reset = weekly_reset
+
+    @staticmethod
+    def _before_reset(eta, reset):
+        return eta is not None and (reset is None or eta < reset)
+
+    @property
+    def session_hits_limit(self):
+        """리셋 전에 세션 한도에 닿을 페이스인지"""
+        return self._before_reset(self.session_eta, self.session_reset)
+
+    @property
+    def weekly_hits_limit(self):
+        return self._before_reset(self.weekly_eta, self.weekly_reset)
+
+    def to_dict(self):
+        def seconds(value):
+            return round(value) if value is not None else None
+
+        return {
+            "rate_per_minute": round(self.rate, 1),
+            "session_seconds_to_limit": seconds(self.session_eta),
+            "session_hits_limit": self.session_hits_limit,
+            "weekly_seconds_to_limit": seconds(self.weekly_eta),
+            "weekly_hits_limit": self.weekly_hits_limit,
+        }
@@ -0,0 +1,355 @@
+"""로컬 SQLite 사용량 인덱스"""
+
+import math
+import sqlite3
+from pathlib import Path
+
+# 롤업 테이블 (이름, 버킷 크기 초) - 작은 것부터
+ROLLUPS = (
+    ("usage_minute", 60),
+    ("usage_hour", 3600),
+    ("usage_day", 86400),
+)
+
+
+def _rollup_schema():
+    """롤업 테이블 + messages 변경 시 버킷을 갱신하는 트리거
+
+    - INSERT: 새 메시지 토큰을 버킷에 더함
+    - UPDATE (최대값 갱신): 예전 값을 예전 버킷에서 빼고 새 값을 새 버킷에 더함
+    - DELETE (오래된 메시지 정리)는 롤업에 영향 없음
+    """
+    tables = []
+    add_new = []
+    remove_old = []
+    for table, size in ROLLUPS:
+        tables.append(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            bucket INTEGER PRIMARY KEY,
+            tokens INTEGER NOT NULL
+        );""")
+        add_new.append(f"""
+            INSERT INTO {table} (bucket, tokens)
+            VALUES (CAST(NEW.ts / {size} AS INTEGER), NEW.input_tokens + NEW.output_tokens)
+            ON CONFLICT (bucket) DO UPDATE SET tokens = tokens + excluded.tokens;""")
+        remove_old.append(f"""
+            UPDATE {table} SET tokens = tokens - (OLD.input_tokens + OLD.output_tokens)
+            WHERE bucket = CAST(OLD.ts / {size} AS INTEGER);""")
+    return "".join(tables) + f"""
+        CREATE TRIGGER IF NOT EXISTS messages_rollup_insert AFTER INSERT ON messages BEGIN{"".join(add_new)}
+        END;
+        CREATE TRIGGER IF NOT EXISTS messages_rollup_update
+        AFTER UPDATE OF ts, input_tokens, output_tokens ON messages BEGIN{"".join(remove_old)}{"".join(add_new)}
+        END;
+    """
+
+
+def _breakdown_schema():
+    """(일, 파일, 모델)별 토큰 종류 합계 테이블 + 트리거 (프로젝트/모델별 분해표용)
+
+    주간 윈도우는 일 경계에서 시작하므로 분해표는 일 버킷 몇 개 + 오늘 치 원본 메시지만 보면 됨
+    """
+    columns = ("input_tokens", "output_tokens", "cache_creation_tokens", "cache_read_tokens")
+    add_new = ", ".join(f"NEW.{c}" for c in columns)
+    add_set = ", ".join(f"{c} = {c} + excluded.{c}" for c in columns)
+    remove_set = ", ".join(f"{c} = {c} - OLD.{c}" for c in columns)
+    return f"""
+        CREATE TABLE IF NOT EXISTS usage_day_breakdown (
+            bucket INTEGER NOT NULL,
+            file TEXT NOT NULL,
+            model TEXT NOT NULL,
+            {", ".join(f"{c} INTEGER NOT NULL" for c in columns)},
+            messages INTEGER NOT NULL,
+            PRIMARY KEY (bucket, file, model)
+        );
+        CREATE TRIGGER IF NOT EXISTS messages_breakdown_insert AFTER INSERT ON messages BEGIN
+            INSERT INTO usage_day_breakdown (bucket, file, model, {", ".join(columns)}, messages)
+            VALUES (CAST(NEW.ts / 86400 AS INTEGER), NEW.file, NEW.model, {add_new}, 1)
+            ON CONFLICT (bucket, file, model) DO UPDATE SET {add_set}, messages = messages + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS messages_breakdown_update AFTER UPDATE ON messages BEGIN
+            UPDATE usage_day_breakdown SET {remove_set}, messages = messages - 1
+            WHERE bucket = CAST(OLD.ts / 86400 AS INTEGER) AND file = OLD.file AND model = OLD.model;
+            INSERT INTO usage_day_breakdown (bucket, file, model, {", ".join(columns)}, messages)
+            VALUES (CAST(NEW.ts / 86400 AS INTEGER), NEW.file, NEW.model, {add_new}, 1)
+            ON CONFLICT (bucket, file, model) DO UPDATE SET {add_set}, messages = messages + 1;
+        END;
+    """
+
+
+class UsageIndex:
+    """로컬 SQLite 사용량 인덱스 - 메시지 ID 기준 (ts, 토큰 종류별 수, 모델, 원본 파일, offset) 저장
+
+    - 메시지 ID는 64비트 해시(dedup.hash_key)를 rowid로 써서 인덱스를 작게 유지
+    - 메시지 ID 기준 중복 제거 (최대값만 유지, ID 없는 메시지는 처음 것만)
+    - 파일별 (inode, size, mtime, offset)도 같이 저장해서 재시작해도 이어서 읽음
+    - 디렉터리 목록 캐시(manifest.DirectoryManifest)도 여기 저장
+    - 분/시간/일 단위 롤업을 트리거로 증분 유지 → 윈도우 합계는 버킷 몇 개 더하기
+    - (일, 파일, 모델)별 토큰 종류 합계도 트리거로 유지 → 분해표도 로그 재스캔 없이 계산
+    - 행마다 출처(origin, 로컬은 "")와 반영 순번(rev)을 둬서 다른 PC와 주고받을 변경분을 찾음
+    """
+
+    SCHEMA_VERSION = 5
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            inode INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            mtime REAL NOT NULL,
+            offset INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY,
+            ts REAL NOT NULL,
+            input_tokens INTEGER NOT NULL,
+            output_tokens INTEGER NOT NULL,
+            cache_creation_tokens INTEGER NOT NULL,
+            cache_read_tokens INTEGER NOT NULL,
+            model TEXT NOT NULL,
+            file TEXT NOT NULL,
+            offset INTEGER NOT NULL,
+            origin TEXT NOT NULL,
+            rev INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS messages_ts ON messages (ts);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value
+        );
+        CREATE TABLE IF NOT EXISTS imported_segments (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS dirs (
+            path TEXT PRIMARY KEY,
+            mtime REAL NOT NULL,
+            checked REAL NOT NULL,
+            subdirs TEXT NOT NULL,
+            files TEXT NOT NULL
+        );
+    """ + _rollup_schema() + _breakdown_schema()
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            # 스캔은 백그라운드 워커 스레드에서 돌기 때문에 스레드 체크 해제
+            self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.Error:
+            # 캐시 폴더에 못 쓰면 메모리 인덱스로라도 동작
+            self.conn = sqlite3.connect(":memory:", check_same_thread=False)
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.init_schema()
+        self.min_changed_ts = None  # 마지막 take_min_changed_ts() 이후 들어온 레코드 중 가장 이른 ts
+        self.rev = self.get_meta("rev", 0)  # add_records 호출마다 1씩 (commit 때 저장)
+        self.saved_rev = self.rev
+
+    def init_schema(self):
+        """스키마 생성 (버전이 다르면 캐시이므로 버리고 새로 만듦)"""
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != self.SCHEMA_VERSION:
+            tables = [row[0] for row in self.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )]
+            for table in tables:
+                self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+        self.conn.executescript(self.SCHEMA)
+        self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        self.conn.commit()
+
+    def get_file_state(self, path):
+        """파일 수집 상태 (inode, size, mtime, offset) 또는 None"""
+        return self.conn.execute(
+            "SELECT inode, size, mtime, offset FROM files WHERE path = ?", (path,)
+        ).fetchone()
+
+    def set_file_state(self, path, inode, size, mtime, offset):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, inode, size, mtime, offset) VALUES (?, ?, ?, ?, ?)",
+            (path, inode, size, mtime, offset)
+        )
+
+    def load_dirs(self):
+        """저장된 디렉터리 목록 (path, mtime, checked, subdirs JSON, files JSON)"""
+        return self.conn.execute("SELECT path, mtime, checked, subdirs, files FROM dirs").fetchall()
+
+    def save_dirs(self, rows, removed=()):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO dirs (path, mtime, checked, subdirs, files) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        self.conn.executemany("DELETE FROM dirs WHERE path = ?", [(path,) for path in removed])
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else default
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def add_records(self, records, origin=""):
+        """(id, ts, input, output, cache_creation, cache_read, model, file, offset, has_id) 레코드 반영
+        → 실제로 쓰인 행 수 (origin은 다른 PC에서 가져온 레코드일 때 그 PC ID)"""
+        if not records:
+            return 0
+        oldest = min(r[1] for r in records)
+        if self.min_changed_ts is None or oldest < self.min_changed_ts:
+            self.min_changed_ts = oldest
+        self.rev += 1
+        tail = (origin, self.rev)
+        with_id = [r[:9] + tail for r in records if r[9]]
+        without_id = [r[:9] + tail for r in records if not r[9]]
+        # 메시지 ID 기준 중복 제거 (최대값만 저장)
+        updated = self.conn.executemany(
+            """
+            INSERT INTO messages (id, ts, input_tokens, output_tokens, cache_creation_tokens,
+                                  cache_read_tokens, model, file, offset, origin, rev)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                ts = excluded.ts,
+                input_tokens = excluded.input_tokens,
+                output_tokens = excluded.output_tokens,
+                cache_creation_tokens = excluded.cache_creation_tokens,
+                cache_read_tokens = excluded.cache_read_tokens,
+                model = excluded.model,
+                file = excluded.file,
+                offset = excluded.offset,
+                origin = excluded.origin,
+                rev = excluded.rev
+            WHERE excluded.input_tokens + excluded.output_tokens
+                > messages.input_tokens + messages.output_tokens
+            """,
+            with_id
+        )
+        # ID 없는 메시지는 처음 것만 유지
+        inserted = self.conn.executemany(
+            "INSERT OR IGNORE INTO messages (id, ts, input_tokens, output_tokens, cache_creation_tokens,"
+            " cache_read_tokens, model, file, offset, origin, rev) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            without_id
+        )
+        # rowcount에는 트리거로 바뀐 롤업 행이 안 들어감
+        return max(updated.rowcount, 0) + max(inserted.rowcount, 0)
+
+    def prune(self, before_ts, live_paths=None):
+        """윈도우보다 오래된 메시지와 사라진 파일 상태 정리 (live_paths가 None이면 파일 정리 생략)
+
+        시간/일 롤업은 그대로 남기고, 분 롤업만 하루 여유를 두고 정리
+        """
+        self.conn.execute("DELETE FROM messages WHERE ts < ?", (before_ts,))
+        self.conn.execute("DELETE FROM usage_minute WHERE bucket < ?", (int((before_ts - 86400) // 60),))
+        self.conn.execute("DELETE FROM usage_day_breakdown WHERE bucket < ?", (int(before_ts // 86400),))
+        if live_paths is None:
+            return
+        known = [row[0] for row in self.conn.execute("SELECT path FROM files")]
+        gone = [(path,) for path in known if path not in live_paths]
+        self.conn.executemany("DELETE FROM files WHERE path = ?", gone)
+
+    def commit(self):
+        # 윈도우만 다시 계산한 갱신은 아무것도 안 쓰도록 rev가 바뀌었을 때만 저장
+        if self.rev != self.saved_rev:
+            self.set_meta("rev", self.rev)
+            self.saved_rev = self.rev
+        self.conn.commit()
+
+    def local_changes(self, after_rev):
+        """after_rev 이후 바뀐 로컬 메시지 (id, ts, input, output) - 스냅샷 내보내기용"""
+        return self.conn.execute(
+            "SELECT id, ts, input_tokens, output_tokens FROM messages WHERE origin = '' AND rev > ?",
+            (after_rev,)
+        ).fetchall()
+
+    def imported_segments(self):
+        """이미 가져온 세그먼트 {경로: 크기}"""
+        return dict(self.conn.execute("SELECT path, size FROM imported_segments"))
+
+    def set_segments_imported(self, rows, removed=()):
+        self.conn.executemany("INSERT OR REPLACE INTO imported_segments (path, size) VALUES (?, ?)", rows)
+        self.conn.executemany("DELETE FROM imported_segments WHERE path = ?", [(path,) for path in removed])
+
+    def tokens_since(self, since_ts):
+        """since_ts 이후 (토큰 합계, 첫 메시지 ts)
+
+        since_ts가 분 경계에 안 맞는 앞부분만 원본 메시지에서 더하고,
+        나머지는 분 → 시간 → 일 롤업으로 올라가면서 버킷 몇 개만 더함
+        """
+        minute_start = math.ceil(since_ts / 60) * 60
+        total = self.conn.execute(
+            "SELECT COALESCE(SUM(input_tokens + output_tokens), 0) FROM messages WHERE ts >= ? AND ts < ?",
+            (since_ts, minute_start)
+        ).fetchone()[0]
+
+        start = minute_start
+        for i, (table, size) in enumerate(ROLLUPS):
+            if i + 1 < len(ROLLUPS):
+                # 다음(더 큰) 버킷 경계까지만 이 단위로
+                next_size = ROLLUPS[i + 1][1]
+                end = math.ceil(start / next_size) * next_size
+                bucket_range = "bucket >= ? AND bucket < ?"
+                params = (start // size, end // size)
+            else:
+                end = start
+                bucket_range = "bucket >= ?"
+                params = (start // size,)
+            total += self.conn.execute(
+                f"SELECT COALESCE(SUM(tokens), 0) FROM {table} WHERE {bucket_range}", params
+            ).fetchone()[0]
+            start = end
+
+        first_ts = self.conn.execute("SELECT MIN(ts) FROM messages WHERE ts >= ?", (since_ts,)).fetchone()[0]
+        return total, first_ts
+
+    def take_min_changed_ts(self):
+        """지난번 호출 이후 반영된 레코드의 가장 이른 ts (없으면 None) - 세션 블록 재계산 판단용"""
+        ts, self.min_changed_ts = self.min_changed_ts, None
+        return ts
+
+    def active_minutes(self, since_ts):
+        """since_ts가 속한 분부터 토큰이 있는 분 버킷 목록 (오름차순)"""
+        return [row[0] for row in self.conn.execute(
+            "SELECT bucket FROM usage_minute WHERE bucket >= ? AND tokens > 0 ORDER BY bucket",
+            (int(since_ts // 60),)
+        )]
+
+    def minute_series(self, since_ts):
+        """since_ts 이후 분 롤업 [(분 버킷, 토큰)] (속도 예측용)"""
+        return self.conn.execute(
+            "SELECT bucket, tokens FROM usage_minute WHERE bucket >= ? ORDER BY bucket",
+            (int(since_ts // 60),)
+        ).fetchall()
+
+    def hour_series(self, since_ts):
+        """since_ts가 속한 시간부터 시간 롤업 [(시간 버킷, 토큰)] (장기 보관소 반영용)"""
+        return self.conn.execute(
+            "SELECT bucket, tokens FROM usage_hour WHERE bucket >= ? ORDER BY bucket",
+            (int(since_ts // 3600),)
+        ).fetchall()
+
+    def breakdown_since(self, since_ts):
+        """since_ts 이후 (파일, 모델)별 (input, output, cache_creation, cache_read, 메시지 수) 합계 행
+
+        일 경계까지의 앞부분만 원본 메시지에서, 나머지는 일 버킷에서 더함
+        """
+        day_start = math.ceil(since_ts / 86400) * 86400
+        return self.conn.execute(
+            """
+            SELECT file, model, SUM(input_tokens), SUM(output_tokens),
+                   SUM(cache_creation_tokens), SUM(cache_read_tokens), SUM(messages)
+            FROM (
+                SELECT file, model, input_tokens, output_tokens,
+                       cache_creation_tokens, cache_read_tokens, 1 AS messages
+                FROM messages WHERE ts >= ? AND ts < ?
+                UNION ALL
+                SELECT file, model, input_tokens, output_tokens,
+                       cache_creation_tokens, cache_read_tokens, messages
+                FROM usage_day_breakdown WHERE bucket >= ?
+            )
+            GROUP BY file, model
+            HAVING SUM(messages) > 0
+            """,
+            (since_ts, day_start, day_start // 86400)
+        ).fetchall()
+
+    def close(self):
+        self.conn.close()
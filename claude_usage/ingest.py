@@ -0,0 +1,218 @@
+"""JSONL 로그 증분 수집"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from .dedup import hash_key
+from .parsing import LineScanner, format_iso_utc, find_window_offset, prefilter_line, parse_usage_line
+
+# 새로 읽는 파일이 이보다 크면 윈도우 시작 지점을 이분 탐색으로 찾아서 거기서부터 읽음
+SEEK_THRESHOLD = 1024 * 1024
+
+
+class IngestTask:
+    """파일 하나에서 새로 읽을 구간 (stat 결과 + 시작 offset)"""
+
+    __slots__ = ("path", "inode", "size", "mtime", "offset")
+
+    def __init__(self, path, inode, size, mtime, offset):
+        self.path = path
+        self.inode = inode
+        self.size = size
+        self.mtime = mtime
+        self.offset = offset
+
+    @property
+    def pending_bytes(self):
+        return self.size - self.offset
+
+
+def parse_task(task, since_ts=None):
+    """task 구간을 읽어서 (레코드 목록, 소비한 끝 offset, 통계) 반환 - 프로세스 풀 워커에서도 그대로 실행
+
+    레코드는 (id, ts, input, output, cache_creation, cache_read, model, file, offset, has_id)이고
+    파일 안에서 미리 중복 제거됨 (ID 있으면 최대값, 없으면 처음 것).
+    id는 메시지 키의 64비트 해시. 파일을 못 읽으면 None
+    통계는 (읽은 바이트, 파싱한 줄, 사전 필터로 버린 줄, 파일 안 중복) - ScanMetrics용
+    """
+    path = task.path
+    offset = task.offset
+    since_iso = format_iso_utc(since_ts) if since_ts is not None else None
+    scanner = LineScanner(since_iso)
+    # 파일 안 중복만 미리 걸러서 보낼 양을 줄임 (파일 간 / 재수집 중복은 인덱스 UPSERT가 처리)
+    msg_records = {}  # id -> 레코드 (최대값 기준)
+    models = {}       # 모델 이름은 몇 개뿐이라 레코드마다 새 문자열을 들고 있지 않게 공유
+    parsed = duplicates = 0
+
+    def add_line(line_offset, line):
+        nonlocal parsed, duplicates
+        parsed += 1
+        try:
+            record = parse_usage_line(line, path)
+            if record is None:
+                return
+            msg_key, ts, input_tokens, output_tokens, cache_creation, cache_read, model = record
+            has_id = not msg_key.startswith(path + "_")
+            msg_id = hash_key(msg_key)
+        except (ValueError, TypeError, AttributeError, OverflowError):
+            # 모양이 이상한 줄 하나 때문에 파일 전체(와 이후 스캔)가 멈추지 않게 그 줄만 버림
+            return
+        if ts is None:
+            ts = task.mtime
+        if since_ts is not None and ts < since_ts:
+            return
+        prev = msg_records.get(msg_id)
+        if prev is not None and (not has_id or prev[2] + prev[3] >= input_tokens + output_tokens):
+            duplicates += 1
+            return
+        model = models.setdefault(model, model)
+        msg_records[msg_id] = (msg_id, ts, input_tokens, output_tokens, cache_creation, cache_read, model,
+                               path, line_offset, has_id)
+
+    try:
+        with open(path, "rb") as f:
+            if offset == 0 and since_iso is not None and task.size > SEEK_THRESHOLD:
+                offset = find_window_offset(f, task.size, since_iso)
+            f.seek(offset)
+            # 싼 바이트 검사(사전 필터)를 통과한 줄만 잘라서 디코딩
+            for line_offset, line in scanner.lines(f, task.size - offset):
+                add_line(offset + line_offset, line)
+    except OSError:
+        return None
+
+    # 마지막 줄이 아직 쓰이는 중일 수 있으니 완결된 줄까지만 소비
+    end = scanner.consumed
+    tail = scanner.tail
+    if tail.strip() and parse_usage_line(tail, path) is not None:
+        if prefilter_line(tail, since_iso):
+            add_line(offset + end, tail)
+        else:
+            scanner.skipped += 1
+        end += len(tail)
+
+    return list(msg_records.values()), offset + end, (scanner.bytes_read, parsed, scanner.skipped, duplicates)
+
+
+class JsonlIngester:
+    """JSONL 증분 수집기 - 파일별 (inode, size, mtime, offset)을 기억하고 새로 추가된 바이트만 파싱
+
+    - 파일이 줄었거나(truncate) inode가 바뀌면(rotation) 처음부터 다시 스캔
+    - 이미 인덱스에 들어간 메시지는 ID 기준으로 합쳐지므로 다시 읽어도 중복 집계 안 됨
+    - 새로 읽을 양이 parallel_threshold 이상이면 파일들을 프로세스 풀에 나눠서 파싱
+    - 그보다 적어도 파일이 여러 개면 최대 io_concurrency개를 스레드에서 동시에 읽음
+      (로밍 프로필 / 네트워크 동기화 폴더처럼 파일마다 대기 시간이 긴 저장소용)
+    """
+
+    # 이보다 적게 읽을 때는 프로세스 띄우는 비용이 더 크니 단일 프로세스로
+    PARALLEL_THRESHOLD = 32 * 1024 * 1024
+    # 동시에 열어서 읽는 파일 수 (1이면 한 파일씩)
+    IO_CONCURRENCY = 8
+
+    def __init__(self, index, workers=1, parallel_threshold=PARALLEL_THRESHOLD, io_concurrency=IO_CONCURRENCY):
+        self.index = index
+        self.workers = workers
+        self.parallel_threshold = parallel_threshold
+        self.io_concurrency = io_concurrency
+
+    def plan(self, filepath, st):
+        """새로 읽을 구간이 있으면 IngestTask, 변경 없으면 None"""
+        path = str(filepath)
+        state = self.index.get_file_state(path)
+        offset = 0
+
+        if state is not None:
+            inode, size, mtime, offset = state
+            if inode == st.st_ino and size == st.st_size and mtime == st.st_mtime:
+                return None
+            # 교체됐거나 잘렸거나 같은 크기로 다시 쓰인 파일 → 처음부터 다시
+            if inode != st.st_ino or st.st_size <= offset:
+                offset = 0
+
+        return IngestTask(path, st.st_ino, st.st_size, st.st_mtime, offset)
+
+    def commit_task(self, task, result, metrics=None):
+        """파싱 결과를 인덱스에 반영 (메시지 ID 기준 최대값 병합은 인덱스가 담당)"""
+        if result is None:
+            return
+        records, end_offset, stats = result
+        written = self.index.add_records(records)
+        self.index.set_file_state(task.path, task.inode, task.size, task.mtime, end_offset)
+        if metrics is not None:
+            bytes_read, parsed, skipped, duplicates = stats
+            metrics.files_opened += 1
+            metrics.bytes_read += bytes_read
+            metrics.lines_parsed += parsed
+            metrics.lines_skipped += skipped
+            metrics.dedup_hits += duplicates + len(records) - written
+
+    def ingest(self, filepath, st, since_ts=None):
+        """파일에 새로 추가된 부분만 읽어서 인덱스에 반영 (since_ts보다 오래된 줄은 버림)"""
+        task = self.plan(filepath, st)
+        if task is not None:
+            self.commit_task(task, parse_task(task, since_ts))
+
+    def run(self, tasks, since_ts=None, cancel=None, metrics=None):
+        """task 목록 수집 → 끝까지 했으면 True, cancel()로 중단됐으면 False"""
+        pending_bytes = sum(task.pending_bytes for task in tasks)
+        if self.workers > 1 and len(tasks) > 1 and pending_bytes >= self.parallel_threshold:
+            return self._run_parallel(tasks, since_ts, cancel, metrics)
+        if self.io_concurrency > 1 and len(tasks) > 1:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return asyncio.run(self._run_async(tasks, since_ts, cancel, metrics))
+            # 이미 이벤트 루프 안에서 불렸으면 (async 앱에 임베드) 그냥 한 파일씩
+
+        for task in tasks:
+            if cancel is not None and cancel():
+                return False
+            self.commit_task(task, parse_task(task, since_ts), metrics)
+        return True
+
+    async def _run_async(self, tasks, since_ts, cancel, metrics=None):
+        """파일 읽기 + 파싱을 스레드 풀에 최대 io_concurrency개씩 맡기고, 끝나는 순서대로 이 스레드에서 반영
+
+        파싱은 GIL 때문에 겹치지 않지만 open/read 대기는 겹쳐짐.
+        인덱스 반영(중복 제거 포함)은 소비자 하나만 하므로 SQLite 연결은 이 스레드에서만 씀
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.io_concurrency)
+        executor = ThreadPoolExecutor(max_workers=min(self.io_concurrency, len(tasks)),
+                                      thread_name_prefix="ClaudeUsageRead")
+
+        async def read(task):
+            async with semaphore:
+                return task, await loop.run_in_executor(executor, parse_task, task, since_ts)
+
+        jobs = [asyncio.ensure_future(read(task)) for task in tasks]
+        try:
+            for next_result in asyncio.as_completed(jobs):
+                task, result = await next_result
+                if cancel is not None and cancel():
+                    return False
+                self.commit_task(task, result, metrics)
+            return True
+        finally:
+            # 중단됐으면 아직 안 끝난 읽기를 취소 (이미 스레드에서 읽는 중인 파일은 executor 종료 때 끝남)
+            for job in jobs:
+                job.cancel()
+            await asyncio.gather(*jobs, return_exceptions=True)
+            executor.shutdown(wait=True)
+
+    def _run_parallel(self, tasks, since_ts, cancel, metrics=None):
+        """프로세스 풀에서 파싱하고 결과는 메인 프로세스에서 인덱스로 병합"""
+        # 워커/감시 스레드가 떠 있는 상태라 fork 대신 spawn
+        context = multiprocessing.get_context("spawn")
+        executor = ProcessPoolExecutor(max_workers=min(self.workers, len(tasks)), mp_context=context)
+        try:
+            futures = {executor.submit(parse_task, task, since_ts): task for task in tasks}
+            for future in as_completed(futures):
+                if cancel is not None and cancel():
+                    for f in futures:
+                        f.cancel()
+                    return False
+                self.commit_task(futures[future], future.result(), metrics)
+            return True
+        finally:
+            executor.shutdown(wait=True)
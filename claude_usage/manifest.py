@@ -0,0 +1,136 @@
+"""로그 폴더 목록 캐시 (디렉터리 mtime 기준)"""
+
+import json
+import os
+import time
+
+
+class DirectoryManifest:
+    """디렉터리별 (mtime, 하위 폴더, jsonl 파일과 mtime) 목록을 인덱스에 저장해 두고 재사용
+
+    - 디렉터리 mtime이 그대로면 scandir 없이 저장된 목록을 씀
+      (파일 추가/삭제/이름 변경은 디렉터리 mtime을 바꾸지만, 기존 파일에 append 하는 건 안 바꿈)
+    - 기본은 파일마다 stat (오래된 파일에도 언제든 새 줄이 붙을 수 있음,
+      안 바뀐 파일의 파싱은 JsonlIngester.plan이 건너뜀)
+    - skip_dormant=True면(폴더 감시가 떠 있어서 append가 이벤트로 들어올 때) 첫 전체 walk 이후로는
+      mtime이 윈도우 시작보다 오래된 파일을 휴면으로 보고 stat도 안 함
+      → 주기적 전체 재스캔 비용이 (디렉터리 수 + 활성 파일 수)만큼만 듦
+    - 전부 stat 해야 할 때는 목록 캐시 대신 scandir로 다시 훑음 (저장된 이름마다 os.stat 하는 것보다 쌈,
+      Windows는 scandir 결과에 stat이 같이 옴)
+    - mtime 해상도가 거친 파일 시스템 대비로 RECHECK_INTERVAL마다는 다시 훑음
+    """
+
+    RECHECK_INTERVAL = 6 * 3600
+
+    def __init__(self, index):
+        self.index = index
+        self.dirs = None  # path -> [mtime, checked, subdirs, files{name: mtime}]
+        self.walked = False  # 이 프로세스에서 전체 stat walk를 한 번 했는지
+
+    def load(self):
+        self.dirs = {}
+        for path, mtime, checked, subdirs, files in self.index.load_dirs():
+            try:
+                files = json.loads(files)
+                if isinstance(files, list):
+                    # 파일 이름만 저장하던 때의 목록 → mtime을 모르니 다음 walk에서 stat
+                    files = dict.fromkeys(files)
+                self.dirs[path] = [mtime, checked, json.loads(subdirs), files]
+            except ValueError:
+                continue
+
+    def _list(self, path, metrics=None):
+        """scandir로 디렉터리 목록 새로 만들기 → (하위 폴더 이름들, {파일 이름: stat})"""
+        subdirs = []
+        stats = {}
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif entry.name.endswith(".jsonl"):
+                        # Windows에서는 scandir 결과에 stat 정보가 같이 와서 추가 비용 없음
+                        stats[entry.name] = entry.stat()
+                        if metrics is not None:
+                            metrics.files_stated += 1
+                except OSError:
+                    continue
+        return subdirs, stats
+
+    def walk(self, root, since_ts, metrics=None, skip_dormant=False):
+        """(활성 파일 [(경로, stat)], 살아 있는 모든 jsonl 경로 set) 반환
+
+        활성 = mtime이 since_ts 이후인 파일 (그보다 오래된 파일은 경로만 live 목록에 들어감, 인덱스 정리용)
+        skip_dormant면 첫 walk 이후 휴면 파일은 stat 없이 건너뜀 (폴더 감시가 append를 잡아 줄 때만)
+        metrics(ScanMetrics)가 있으면 stat 호출 수를 셈
+        """
+        stat_count = 0
+        if self.dirs is None:
+            self.load()
+        skip_dormant = skip_dormant and self.walked
+        now = time.time()
+        active = []
+        live = set()
+        seen = {}
+        changed = []
+        stack = [str(root)]
+        while stack:
+            path = stack.pop()
+            stat_count += 1
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            cached = self.dirs.get(path)
+            stale = cached is None or cached[0] != mtime or now - cached[1] >= self.RECHECK_INTERVAL
+            fresh = stale or not skip_dormant
+            stats = {}
+            if fresh:
+                try:
+                    subdirs, stats = self._list(path, metrics)
+                except OSError:
+                    continue
+                files = {name: st.st_mtime for name, st in stats.items()}
+                # 목록이 그대로면 저장 안 함 (확인 시각은 RECHECK_INTERVAL이 지났을 때만 갱신)
+                dirty = stale or cached[2] != subdirs or cached[3] != files
+                entry = [mtime, now if dirty else cached[1], subdirs, files]
+            else:
+                dirty = False
+                entry = cached
+                subdirs, files = entry[2], entry[3]
+            seen[path] = entry
+
+            prefix = os.path.join(path, "")
+            for name, file_mtime in files.items():
+                file_path = prefix + name
+                live.add(file_path)
+                st = stats.get(name)
+                if st is None:
+                    if skip_dormant and file_mtime is not None and file_mtime < since_ts:
+                        continue  # 휴면 파일 (append는 폴더 감시가 경로로 넘겨줌)
+                    stat_count += 1
+                    try:
+                        st = os.stat(file_path)
+                    except OSError:
+                        continue
+                    if st.st_mtime != file_mtime:
+                        files[name] = st.st_mtime
+                        dirty = True
+                if st.st_mtime >= since_ts:
+                    active.append((file_path, st))
+            if dirty:
+                changed.append(path)
+            stack.extend(prefix + name for name in subdirs)
+
+        self.walked = True
+        if metrics is not None:
+            metrics.files_stated += stat_count
+        removed = [path for path in self.dirs if path not in seen]
+        self.dirs = seen
+        if changed or removed:
+            self.index.save_dirs(
+                [(path, seen[path][0], seen[path][1], json.dumps(seen[path][2]), json.dumps(seen[path][3]))
+                 for path in changed],
+                removed
+            )
+        return active, live
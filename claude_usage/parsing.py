@@ -0,0 +1,200 @@
+"""JSONL 줄 파싱 - 바이트 단계 사전 필터, 타임스탬프 비교, usage 레코드 추출"""
+
+import json
+from datetime import datetime, timezone
+
+# orjson이 설치돼 있으면 더 빠른 디코더 사용 (없으면 표준 json)
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+# 한 번에 읽는 바이너리 청크 크기 (파일이 아무리 커도 메모리는 이 정도만 씀)
+READ_CHUNK = 1024 * 1024
+
+
+def parse_timestamp(timestamp_str):
+    """ISO 타임스탬프 문자열 → epoch 초 (파싱 실패 시 None)"""
+    try:
+        return datetime.fromisoformat(timestamp_str.replace("Z", "+00:00")).timestamp()
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def format_iso_utc(ts):
+    """epoch 초 → JSONL과 같은 형식의 UTC ISO 문자열 (bytes, 사전순 비교용)"""
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S").encode()
+
+
+def extract_utc_timestamp(line, start=0, end=None):
+    """줄 끝의 최상위 "timestamp" 값 (UTC Z 형식일 때만, bytes) 또는 None
+
+    start/end를 주면 큰 버퍼 안의 줄 구간에서 바로 찾음 (줄을 잘라 복사하지 않음)
+    """
+    if end is None:
+        end = len(line)
+    key_pos = line.rfind(b'"timestamp"', start, end)
+    if key_pos == -1:
+        return None
+    # "timestamp": "..." 값의 따옴표 위치 (정규식보다 slice가 훨씬 빠름)
+    value_start = line.find(b'"', key_pos + 11, end) + 1
+    value_stop = line.find(b'"', value_start, end)
+    if value_start == 0 or value_stop == -1 or line[value_stop - 1] != 0x5A:  # "Z"
+        return None
+    return line[value_start:value_stop]
+
+
+def prefilter_line(line, since_iso=None, start=0, end=None):
+    """json 디코딩 전에 걸러내기 - usage가 없거나 since_iso보다 확실히 오래된 줄이면 False
+
+    타임스탬프는 맨 끝 최상위 키라서 마지막 "timestamp"를 보고,
+    UTC(Z) 형식일 때만 사전순 비교로 거름 (애매하면 통과시켜서 json 쪽에서 판단)
+    """
+    if end is None:
+        end = len(line)
+    if line.find(b'"usage"', start, end) == -1:
+        return False
+    if since_iso is None:
+        return True
+    ts = extract_utc_timestamp(line, start, end)
+    if ts is None:
+        return True
+    return ts[:len(since_iso)] >= since_iso
+
+
+class LineScanner:
+    """바이너리 청크 단위 줄 스캐너 - 사전 필터를 통과한 줄만 bytes로 잘라서 넘김
+
+    줄 경계 찾기와 사전 필터는 청크 버퍼 위에서 find로만 하므로 버려지는 줄은 복사도 디코딩도 안 하고,
+    파일 전체를 한 번에 읽지 않아서 수백 MB 세션 파일도 메모리는 청크 두세 개 정도만 씀.
+    끝난 뒤 consumed = 마지막 줄바꿈까지 읽은 바이트 수, tail = 그 뒤 줄바꿈 없는 조각
+    """
+
+    def __init__(self, since_iso=None, chunk_size=READ_CHUNK):
+        self.since_iso = since_iso
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+        self.skipped = 0
+        self.consumed = 0
+        self.tail = b""
+
+    def lines(self, f, size=None):
+        """f의 현재 위치부터 size 바이트(없으면 끝까지) → (현재 위치 기준 offset, 줄 bytes) 반복"""
+        remaining = size
+        parts = []  # 아직 줄바꿈이 안 나온 앞 조각들 (긴 줄은 청크 여러 개에 걸침)
+        base = 0    # parts 첫 바이트의 offset
+        while remaining is None or remaining > 0:
+            block = f.read(self.chunk_size if remaining is None else min(self.chunk_size, remaining))
+            if not block:
+                break
+            self.bytes_read += len(block)
+            if remaining is not None:
+                remaining -= len(block)
+            # 줄바꿈은 새 청크에서만 찾고, 없으면 조각만 쌓아 둠 (긴 줄도 앞부분을 매번 다시 복사하지 않음)
+            nl = block.find(b"\n")
+            if nl < 0:
+                parts.append(block)
+                continue
+            if parts:
+                # 걸쳐 있던 줄 완성 - 조각들은 여기서 한 번만 이어 붙임
+                parts.append(block[:nl + 1])
+                line = b"".join(parts)
+                parts = []
+                yield from self._split(line, len(line), base)
+                base += len(line)
+                block = block[nl + 1:]
+            last = block.rfind(b"\n") + 1
+            yield from self._split(block, last, base)
+            if last < len(block):
+                parts.append(block[last:])
+            base += last
+        self.consumed = base
+        self.tail = b"".join(parts)
+
+    def _split(self, buf, last, base):
+        """buf[:last](줄바꿈으로 끝남)를 줄로 나눠서 사전 필터 통과한 것만 (offset, 줄)"""
+        since_iso = self.since_iso
+        pos = 0
+        while pos < last:
+            nl = buf.find(b"\n", pos, last)
+            if prefilter_line(buf, since_iso, pos, nl):
+                yield base + pos, buf[pos:nl]
+            else:
+                self.skipped += 1
+            pos = nl + 1
+
+    def lines_to_end(self, f):
+        """파일 끝까지 줄 bytes만 반복 (줄바꿈 없는 마지막 줄도 사전 필터를 통과하면 포함)"""
+        for _, line in self.lines(f):
+            yield line
+        if self.tail.strip():
+            if prefilter_line(self.tail, self.since_iso):
+                yield self.tail
+            else:
+                self.skipped += 1
+
+
+def find_window_offset(f, size, since_iso, block_size=64 * 1024):
+    """시간순으로 append되는 JSONL에서 since_iso 이후 첫 줄 근처의 줄 시작 offset을 이분 탐색
+
+    임의 offset에서 다음 줄 경계로 다시 맞춘 뒤 타임스탬프를 비교해서 O(log n)번만 읽음.
+    남은 구간이 block_size 이하가 되면 멈추고, 그 뒤는 prefilter가 줄 단위로 거름
+    """
+    lo, hi = 0, size
+    while hi - lo > block_size:
+        mid = (lo + hi) // 2
+        # mid가 걸친 줄은 버리고 다음 줄부터 타임스탬프 있는 줄 찾기
+        f.seek(mid - 1)
+        f.readline()
+        ts = None
+        while ts is None:
+            line = f.readline()
+            if not line or f.tell() > hi + block_size:
+                break
+            ts = extract_utc_timestamp(line.rstrip())
+        if ts is None or ts[:len(since_iso)] >= since_iso:
+            hi = mid
+        else:
+            # 이 줄까지는 전부 윈도우 밖
+            lo = f.tell()
+    return lo
+
+
+def token_count(value):
+    """usage 토큰 값 → int (null / 문자열 / 음수 / int64를 넘는 값처럼 이상한 값은 0)"""
+    if isinstance(value, int) and not isinstance(value, bool) and 0 < value < 1 << 62:
+        return value
+    return 0
+
+
+def parse_usage_line(line, filepath):
+    """JSONL 한 줄에서 usage 레코드 추출 → (key, ts, input, output, cache_creation, cache_read, model) 또는 None
+
+    key는 메시지 ID (없으면 파일경로_uuid), ts는 epoch 초 (없으면 None), model은 없으면 ""
+    """
+    try:
+        data = json_loads(line)
+    except (ValueError, RecursionError):
+        # JSONDecodeError / UnicodeDecodeError (orjson 포함), 너무 깊게 중첩된 줄
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    message = data.get("message") or {}
+    usage = message.get("usage") if isinstance(message, dict) else None
+    if not usage or not isinstance(usage, dict):
+        return None
+
+    msg_id = message.get("id")
+    key = msg_id if msg_id and isinstance(msg_id, str) else f"{filepath}_{data.get('uuid', '')}"
+    ts = parse_timestamp(data.get("timestamp", ""))
+    model = message.get("model")
+    return (
+        key, ts,
+        token_count(usage.get("input_tokens")),
+        token_count(usage.get("output_tokens")),
+        token_count(usage.get("cache_creation_input_tokens")),
+        token_count(usage.get("cache_read_input_tokens")),
+        model if isinstance(model, str) else "",
+    )
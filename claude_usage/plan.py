@@ -0,0 +1,42 @@
+"""플랜 정보 및 토큰 한도"""
+
+import json
+
+# 플랜별 5시간 세션 한도 (input + output tokens 기준)
+PLAN_LIMITS = {
+    "pro": 55000,       # ~55K
+    "max": 110000,      # ~110K
+    "max_5x": 110000,   # ~110K
+    "max_20x": 275000,  # ~275K
+}
+
+# 플랜별 주간 한도 (input + output tokens 기준)
+WEEKLY_LIMITS = {
+    "pro": 190000,      # ~190K
+    "max": 380000,      # ~380K
+    "max_5x": 380000,   # ~380K
+    "max_20x": 950000,  # ~950K
+}
+
+
+def load_plan_info(claude_dir):
+    """credentials.json에서 플랜 정보 읽기 → (plan_type, rate_tier)"""
+    credentials_path = claude_dir / ".credentials.json"
+    try:
+        with open(credentials_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+            oauth = data.get("claudeAiOauth", {})
+            plan_type = oauth.get("subscriptionType", "pro")
+            rate_tier = oauth.get("rateLimitTier", "")
+            return plan_type, rate_tier
+    except Exception:
+        return "pro", ""
+
+
+def get_plan_tier(plan_type, rate_tier):
+    """플랜 등급 ("max_20x" / "max_5x" / "pro")"""
+    if "max_20" in rate_tier or "20x" in rate_tier:
+        return "max_20x"
+    elif "max_5" in rate_tier or "5x" in rate_tier or plan_type == "max":
+        return "max_5x"
+    return "pro"
@@ -0,0 +1,133 @@
+"""사용 상황에 맞춘 갱신 주기 - 쓰는 중이면 자주, 조용하면 점점 드물게, 리셋 시각엔 딱 맞춰"""
+
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# psutil이 설치돼 있으면 배터리 상태를 거기서 읽음 (없으면 OS별로 직접)
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def read_on_battery():
+    """배터리로 돌고 있으면 True (데스크톱이거나 알 수 없으면 False)"""
+    if psutil is not None:
+        try:
+            battery = psutil.sensors_battery()
+        except (AttributeError, OSError, RuntimeError):
+            battery = None
+        return battery is not None and battery.power_plugged is False
+
+    if sys.platform == "win32":
+        import ctypes
+
+        class SYSTEM_POWER_STATUS(ctypes.Structure):
+            _fields_ = [
+                ("ACLineStatus", ctypes.c_ubyte),
+                ("BatteryFlag", ctypes.c_ubyte),
+                ("BatteryLifePercent", ctypes.c_ubyte),
+                ("SystemStatusFlag", ctypes.c_ubyte),
+                ("BatteryLifeTime", ctypes.c_ulong),
+                ("BatteryFullLifeTime", ctypes.c_ulong),
+            ]
+
+        status = SYSTEM_POWER_STATUS()
+        if not ctypes.windll.kernel32.GetSystemPowerStatus(ctypes.byref(status)):
+            return False
+        return status.ACLineStatus == 0  # 0 = 전원 분리, 1 = 연결, 255 = 알 수 없음
+
+    # Linux: 전원 어댑터(Mains)가 하나라도 연결돼 있으면 AC
+    adapters = []
+    try:
+        for supply in Path("/sys/class/power_supply").iterdir():
+            try:
+                if (supply / "type").read_text().strip() == "Mains":
+                    adapters.append((supply / "online").read_text().strip() == "1")
+            except OSError:
+                continue
+    except OSError:
+        return False
+    return bool(adapters) and not any(adapters)
+
+
+class BatteryStatus:
+    """배터리 여부 캐시 (갱신 주기를 정할 때마다 OS에 묻지 않도록 CHECK_INTERVAL초마다만 확인)"""
+
+    CHECK_INTERVAL = 60
+
+    def __init__(self):
+        self.value = False
+        self.checked = None
+
+    def on_battery(self):
+        now = time.monotonic()
+        if self.checked is None or now - self.checked >= self.CHECK_INTERVAL:
+            self.checked = now
+            try:
+                self.value = read_on_battery()
+            except Exception:
+                self.value = False
+        return self.value
+
+
+def seconds_until_reset(snapshot, now_ts):
+    """세션/주간 리셋 중 먼저 오는 것까지 남은 초 (지났거나 없으면 None)"""
+    resets = []
+    if snapshot.session_reset_time is not None:
+        resets.append(snapshot.session_reset_time.replace(tzinfo=timezone.utc).timestamp())
+    if snapshot.weekly_reset_time is not None:
+        resets.append(snapshot.weekly_reset_time.timestamp())
+    remaining = [ts - now_ts for ts in resets if ts > now_ts]
+    return min(remaining) if remaining else None
+
+
+class RefreshScheduler:
+    """다음 윈도우 재계산까지 기다릴 시간(초) 정하기
+
+    - 지난번보다 토큰이 늘었거나(쓰는 중) 세션이 한도에 가까우면 ACTIVE_INTERVAL
+    - 조용하면 IDLE_START부터 두 배씩 늘려서 IDLE_MAX까지
+    - 배터리로 돌 때는 모든 간격을 BATTERY_FACTOR배
+    - 그 사이에 세션/주간 리셋이 있으면 리셋 직후(RESET_GRACE초 뒤)에 깨어남
+    """
+
+    ACTIVE_INTERVAL = 5
+    IDLE_START = 30
+    IDLE_MAX = 300
+    BATTERY_FACTOR = 2
+    NEAR_LIMIT_PERCENT = 80
+    RESET_GRACE = 1
+
+    def __init__(self, battery=None):
+        self.battery = battery or BatteryStatus()
+        self.last_tokens = None
+        self.idle_interval = self.IDLE_START
+
+    def longest_delay(self):
+        """결과가 안 올 때 쓰는 대비용 주기 (조용할 때의 최대 간격)"""
+        factor = self.BATTERY_FACTOR if self.battery.on_battery() else 1
+        return self.IDLE_MAX * factor
+
+    def next_delay(self, snapshot, now_ts=None):
+        """snapshot(방금 반영한 결과, 없으면 None) 기준으로 다음 갱신까지 초"""
+        factor = self.BATTERY_FACTOR if self.battery.on_battery() else 1
+        if snapshot is None:
+            return self.IDLE_START * factor
+
+        tokens = (snapshot.session_tokens, snapshot.weekly_tokens)
+        streaming = self.last_tokens is not None and tokens != self.last_tokens
+        self.last_tokens = tokens
+        if streaming or snapshot.session_percent >= self.NEAR_LIMIT_PERCENT:
+            self.idle_interval = self.IDLE_START
+            delay = self.ACTIVE_INTERVAL * factor
+        else:
+            delay = self.idle_interval * factor
+            self.idle_interval = min(self.idle_interval * 2, self.IDLE_MAX)
+
+        now_ts = now_ts if now_ts is not None else datetime.now(timezone.utc).timestamp()
+        reset = seconds_until_reset(snapshot, now_ts)
+        if reset is not None and reset + self.RESET_GRACE < delay:
+            delay = reset + self.RESET_GRACE
+        return delay
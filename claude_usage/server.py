@@ -0,0 +1,169 @@
+"""로컬 HTTP 엔드포인트 - 위젯/데몬이 계산해 둔 최신 사용량을 여러 도구가 같이 읽게 함
+
+GET /usage    → JSON (UsageSnapshot.to_dict())
+GET /metrics  → Prometheus 텍스트 포맷
+"""
+
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .schedule import RefreshScheduler
+from .watch import DirectoryWatcher
+from .worker import ScanWorker
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 47615
+
+
+def format_prometheus(snapshot):
+    """스냅샷 → Prometheus 텍스트 포맷"""
+    now_ts = datetime.now(timezone.utc).timestamp()
+    gauges = [
+        ("claude_usage_session_tokens", "현재 5시간 세션 블록 토큰 (input + output)", snapshot.session_tokens),
+        ("claude_usage_session_limit_tokens", "세션 한도 (플랜 추정치)", snapshot.session_limit),
+        ("claude_usage_session_ratio", "세션 사용률 (0~1)", snapshot.session_percent / 100),
+        ("claude_usage_weekly_tokens", "이번 주 토큰 (input + output)", snapshot.weekly_tokens),
+        ("claude_usage_weekly_limit_tokens", "주간 한도 (플랜 추정치)", snapshot.weekly_limit),
+        ("claude_usage_weekly_ratio", "주간 사용률 (0~1)", snapshot.weekly_percent / 100),
+        ("claude_usage_last_scan_timestamp_seconds", "마지막 스캔 시각", snapshot.scanned_at.timestamp()),
+    ]
+    if snapshot.session_reset_time is not None:
+        reset_ts = snapshot.session_reset_time.replace(tzinfo=timezone.utc).timestamp()
+        gauges.append(("claude_usage_session_reset_seconds", "세션 리셋까지 남은 초", max(0, reset_ts - now_ts)))
+    if snapshot.weekly_reset_time is not None:
+        gauges.append(("claude_usage_weekly_reset_seconds", "주간 리셋까지 남은 초",
+                       max(0, snapshot.weekly_reset_time.timestamp() - now_ts)))
+    if snapshot.forecast is not None:
+        gauges.append(("claude_usage_burn_rate_tokens_per_minute", "최근 사용 속도 (지수 가중 평균)",
+                       snapshot.forecast.rate))
+
+    lines = []
+    for name, help_text, value in gauges:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+
+    metrics = snapshot.metrics
+    if metrics is not None:
+        name = "claude_usage_scan_phase_milliseconds"
+        lines.append(f"# HELP {name} 마지막 갱신의 단계별 소요 시간")
+        lines.append(f"# TYPE {name} gauge")
+        # 위젯은 render 단계를 나중에 추가하므로 복사본으로 순회
+        for phase, ms in list(metrics.phases.items()):
+            lines.append(f'{name}{{phase="{phase}"}} {ms}')
+    return "\n".join(lines) + "\n"
+
+
+class UsageServer:
+    """최신 스냅샷을 localhost로 내보내는 HTTP 서버 (요청마다 스캔하지 않고 get_snapshot() 결과만 씀)"""
+
+    def __init__(self, get_snapshot, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.get_snapshot = get_snapshot
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    def start(self):
+        """서버 시작 (포트를 이미 누가 쓰고 있으면 OSError)"""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.handle(self)
+
+            def log_message(self, format, *args):
+                # pythonw로 뜬 위젯은 stderr가 없어서 기본 로그를 찍으면 안 됨
+                pass
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="ClaudeUsageHTTP", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def handle(self, request):
+        path = request.path.split("?", 1)[0]
+        snapshot = self.get_snapshot()
+        if path not in ("/usage", "/metrics"):
+            self.respond(request, 404, "text/plain; charset=utf-8", "not found\n")
+        elif snapshot is None:
+            # 첫 스캔이 아직 안 끝남
+            self.respond(request, 503, "text/plain; charset=utf-8", "scanning\n")
+        elif path == "/usage":
+            body = json.dumps(snapshot.to_dict(), ensure_ascii=False) + "\n"
+            self.respond(request, 200, "application/json; charset=utf-8", body)
+        else:
+            self.respond(request, 200, "text/plain; version=0.0.4; charset=utf-8", format_prometheus(snapshot))
+
+    @staticmethod
+    def respond(request, status, content_type, body):
+        data = body.encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", content_type)
+        request.send_header("Content-Length", str(len(data)))
+        request.send_header("Cache-Control", "no-store")
+        request.end_headers()
+        request.wfile.write(data)
+
+
+class UsageDaemon:
+    """GUI 없는 상주 모드 - 위젯과 같은 워커 + 폴더 감시로 인덱스를 증분 갱신하고 HTTP로 내보냄"""
+
+    FULL_RESCAN_INTERVAL = 600  # 감시 중이어도 가끔은 전체 재스캔 (초)
+
+    def __init__(self, engine, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.engine = engine
+        self.snapshot = None
+        self.worker = ScanWorker(lambda cancel, paths: engine.scan(paths=paths, cancel=cancel))
+        self.watcher = DirectoryWatcher(engine.projects_dir, self.worker.request)
+        self.server = UsageServer(lambda: self.snapshot, host, port)
+        self.scheduler = RefreshScheduler()  # 윈도우 재계산 주기 (사용 상황에 따라)
+        self._stop = threading.Event()
+
+    def run(self):
+        """stop()이나 Ctrl+C 전까지 실행"""
+        self.server.start()
+        self.worker.start()
+        self.watcher.start()
+        self.engine.watcher = self.watcher
+        self.worker.request()
+        last_full_scan = time.monotonic()
+        next_refresh = last_full_scan + self.scheduler.next_delay(None)
+        try:
+            while not self._stop.is_set():
+                try:
+                    result = self.worker.results.get(timeout=1.0)
+                    if not isinstance(result, Exception):
+                        self.snapshot = result
+                        next_refresh = time.monotonic() + self.scheduler.next_delay(result)
+                except queue.Empty:
+                    pass
+                now = time.monotonic()
+                if now >= next_refresh:
+                    # 결과가 오면 거기서 다시 정함 (안 오면 가장 긴 주기로)
+                    next_refresh = now + self.scheduler.longest_delay()
+                    if self.watcher.mode is None or now - last_full_scan >= self.FULL_RESCAN_INTERVAL:
+                        last_full_scan = now
+                        self.worker.request()
+                    else:
+                        self.worker.request(())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server.stop()
+            self.watcher.stop()
+            self.worker.stop()
+
+    def stop(self):
+        self._stop.set()
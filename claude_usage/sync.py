@@ -0,0 +1,170 @@
+"""여러 PC 사용량 합치기 - 동기화 폴더(Dropbox, OneDrive 등)로 스냅샷 세그먼트를 주고받음
+
+<sync_dir>/<PC ID>/<밀리초>.seg 에 각 PC가 자기 로그에서 새로 바뀐 메시지만 내보내고,
+다른 PC 폴더에서 아직 안 읽은 세그먼트만 가져와서 인덱스에 최대값 기준으로 합침
+"""
+
+import os
+import re
+import secrets
+import socket
+import struct
+import sys
+import time
+from array import array
+from pathlib import Path
+
+SEGMENT_MAGIC = b"CUSEG1\0\0"
+SEGMENT_HEADER = struct.Struct("<8sI")  # magic, 레코드 수
+SEGMENT_SUFFIX = ".seg"
+RECORD_SIZE = 8 + 8 + 4 + 4  # id(int64) + ts(float64) + input(uint32) + output(uint32)
+
+
+def _columns():
+    return array("q"), array("d"), array("I"), array("I")
+
+
+def write_segment(path, rows):
+    """(id, ts, input, output) 행들을 열 단위 바이너리로 저장 (임시 파일에 쓰고 교체)"""
+    columns = _columns()
+    for row in rows:
+        for column, value in zip(columns, row):
+            column.append(value)
+    if sys.byteorder == "big":
+        for column in columns:
+            column.byteswap()
+    tmp_path = str(path) + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, len(rows)))
+        for column in columns:
+            f.write(column.tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_segment(path):
+    """세그먼트 → [(id, ts, input, output)] (아직 덜 동기화됐거나 깨졌으면 ValueError)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < SEGMENT_HEADER.size:
+        raise ValueError("segment too short")
+    magic, count = SEGMENT_HEADER.unpack_from(data)
+    if magic != SEGMENT_MAGIC or len(data) != SEGMENT_HEADER.size + count * RECORD_SIZE:
+        raise ValueError("bad segment")
+    columns = _columns()
+    pos = SEGMENT_HEADER.size
+    for column in columns:
+        size = count * column.itemsize
+        column.frombytes(data[pos:pos + size])
+        pos += size
+    if sys.byteorder == "big":
+        for column in columns:
+            column.byteswap()
+    return list(zip(*columns))
+
+
+def load_machine_id(cache_dir):
+    """이 PC의 ID (호스트 이름 + 랜덤, 캐시 폴더에 저장해 두고 계속 씀)"""
+    host = re.sub(r"[^A-Za-z0-9_.-]", "_", socket.gethostname()) or "pc"
+    path = Path(cache_dir) / "machine_id"
+    try:
+        machine_id = path.read_text(encoding="utf-8").strip()
+        if machine_id:
+            return machine_id
+    except OSError:
+        pass
+    machine_id = f"{host}-{secrets.token_hex(4)}"
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(machine_id, encoding="utf-8")
+    except OSError:
+        # 저장 못 하면 호스트 이름만 (재시작해도 같은 ID가 되도록)
+        return host
+    return machine_id
+
+
+class SnapshotSync:
+    """동기화 폴더로 사용량 스냅샷 내보내기 / 가져오기
+
+    - 내보내기: 인덱스 rev 기준으로 지난번 이후 바뀐 로컬 메시지만 새 세그먼트 하나로
+    - 가져오기: 다른 PC 폴더에서 (경로, 크기)가 처음 보는 세그먼트만 읽어서 최대값 병합
+    - 동기화 폴더는 느릴 수 있어서 EXPORT_INTERVAL / IMPORT_INTERVAL 간격으로만 건드림
+    """
+
+    EXPORT_INTERVAL = 60
+    IMPORT_INTERVAL = 30
+
+    def __init__(self, index, sync_dir, machine_id):
+        self.index = index
+        self.sync_dir = Path(sync_dir)
+        self.machine_id = machine_id
+        self.own_dir = self.sync_dir / machine_id
+        self.last_export = 0.0
+        self.last_import = 0.0
+
+    def run(self, since_ts, force=False):
+        """주기가 됐으면 내보내기 + 가져오기 → 가져온 레코드 수"""
+        now = time.monotonic()
+        imported = 0
+        try:
+            if force or now - self.last_export >= self.EXPORT_INTERVAL:
+                self.last_export = now
+                self.export(since_ts)
+            if force or now - self.last_import >= self.IMPORT_INTERVAL:
+                self.last_import = now
+                imported = self.import_new(since_ts)
+        except OSError:
+            # 동기화 폴더가 잠깐 없어도(네트워크 드라이브 등) 로컬 집계는 계속
+            pass
+        return imported
+
+    def export(self, since_ts):
+        """지난 내보내기 이후 바뀐 로컬 메시지를 세그먼트로 저장 → 내보낸 행 수"""
+        export_rev = self.index.get_meta("export_rev", 0)
+        if self.index.rev <= export_rev:
+            return 0
+        rows = self.index.local_changes(export_rev)
+        self.own_dir.mkdir(parents=True, exist_ok=True)
+        if rows:
+            write_segment(self.own_dir / f"{int(time.time() * 1000):013d}{SEGMENT_SUFFIX}", rows)
+        self.index.set_meta("export_rev", self.index.rev)
+
+        # 세그먼트 시각보다 옛날 메시지만 들어 있으니, 윈도우 시작(+ 시간대 차 여유 하루)보다 오래된 건 정리
+        for entry in os.scandir(self.own_dir):
+            if entry.name.endswith(SEGMENT_SUFFIX) and entry.stat().st_mtime < since_ts - 86400:
+                os.remove(entry.path)
+        return len(rows)
+
+    def import_new(self, since_ts):
+        """다른 PC 폴더에서 새 세그먼트만 가져와서 병합 → 가져온 레코드 수"""
+        if not self.sync_dir.is_dir():
+            return 0
+        known = self.index.imported_segments()
+        seen = set()
+        done = []
+        count = 0
+        for machine in os.scandir(self.sync_dir):
+            if machine.name == self.machine_id or not machine.is_dir():
+                continue
+            origin = machine.name
+            for entry in os.scandir(machine.path):
+                if not entry.name.endswith(SEGMENT_SUFFIX):
+                    continue
+                seen.add(entry.path)
+                size = entry.stat().st_size
+                if known.get(entry.path) == size:
+                    continue
+                try:
+                    rows = read_segment(entry.path)
+                except (OSError, ValueError):
+                    # 아직 동기화 중인 파일일 수 있으니 다음에 다시
+                    continue
+                records = [
+                    (msg_id, ts, input_tokens, output_tokens, 0, 0, "", "@" + origin, 0, True)
+                    for msg_id, ts, input_tokens, output_tokens in rows if ts >= since_ts
+                ]
+                self.index.add_records(records, origin)
+                done.append((entry.path, size))
+                count += len(records)
+        removed = [path for path in known if path not in seen]
+        self.index.set_segments_imported(done, removed)
+        return count
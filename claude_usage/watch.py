@@ -0,0 +1,174 @@
+"""JSONL 로그 폴더 감시 (Linux inotify / 폴링)"""
+
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from .schedule import BatteryStatus, RefreshScheduler
+
+
+class DirectoryWatcher:
+    """JSONL 로그 폴더 감시 - 추가/생성된 JSONL 경로를 debounce 후 on_change(paths)로 전달
+
+    - Linux는 inotify, 그 외 플랫폼이나 inotify 실패 시 scandir 폴링
+    - 폴링은 변화가 없으면 poll_interval부터 두 배씩 늘려서 max_interval까지 (배터리면 BATTERY_FACTOR배)
+    - on_change(None)은 이벤트가 유실돼서 전체 재스캔이 필요하다는 뜻
+    """
+
+    # <sys/inotify.h>
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, root_dir, on_change, debounce=0.2, max_delay=0.8, poll_interval=2.0,
+                 max_interval=RefreshScheduler.IDLE_MAX, battery=None):
+        self.root_dir = str(root_dir)
+        self.on_change = on_change
+        self.debounce = debounce        # 마지막 이벤트 후 이만큼 조용하면 전달
+        self.max_delay = max_delay      # 이벤트가 계속 와도 이 이상은 안 미룸
+        self.poll_interval = poll_interval
+        self.max_interval = max_interval  # 조용할 때 폴링 간격 상한
+        self.battery = battery or BatteryStatus()
+        self.mode = None                # "inotify" | "polling"
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="ClaudeUsageWatch", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout)
+
+    def _run(self):
+        if sys.platform.startswith("linux"):
+            try:
+                self._run_inotify()
+                return
+            except OSError:
+                pass
+        self._run_polling()
+
+    def _run_inotify(self):
+        """inotify 이벤트 루프"""
+        if not os.path.isdir(self.root_dir):
+            raise OSError(f"{self.root_dir} not found")
+        # 플랫폼 전용 모듈은 실제로 쓸 때만 로드
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        watches = {}  # wd -> 디렉토리 경로
+
+        def add_tree(directory, pending):
+            """새 디렉토리 트리 감시 등록 (이미 있던 JSONL도 변경으로 취급)"""
+            for dirpath, _, filenames in os.walk(directory):
+                wd = libc.inotify_add_watch(fd, os.fsencode(dirpath), self.WATCH_MASK)
+                if wd >= 0:
+                    watches[wd] = dirpath
+                if pending is not None:
+                    pending.update(os.path.join(dirpath, n) for n in filenames if n.endswith(".jsonl"))
+
+        self.mode = "inotify"
+        try:
+            add_tree(self.root_dir, None)
+            pending = set()
+            first_event = last_event = None
+            while not self._stop.is_set():
+                timeout = self.debounce if pending else 1.0
+                ready, _, _ = select.select([fd], [], [], timeout)
+                if ready:
+                    try:
+                        buf = os.read(fd, 64 * 1024)
+                    except BlockingIOError:
+                        buf = b""
+                    pos = 0
+                    while pos + self.EVENT_HEADER.size <= len(buf):
+                        wd, mask, _, length = self.EVENT_HEADER.unpack_from(buf, pos)
+                        name_start = pos + self.EVENT_HEADER.size
+                        name = os.fsdecode(buf[name_start:name_start + length].rstrip(b"\0"))
+                        pos = name_start + length
+
+                        if mask & self.IN_Q_OVERFLOW:
+                            pending.add(None)
+                            continue
+                        if mask & self.IN_IGNORED:
+                            watches.pop(wd, None)
+                            continue
+                        directory = watches.get(wd)
+                        if directory is None:
+                            continue
+                        path = os.path.join(directory, name)
+                        if mask & self.IN_ISDIR:
+                            if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                                add_tree(path, pending)
+                        elif name.endswith(".jsonl"):
+                            pending.add(path)
+                    now = time.monotonic()
+                    if pending:
+                        first_event = first_event or now
+                        last_event = now
+
+                if pending:
+                    now = time.monotonic()
+                    if now - last_event >= self.debounce or now - first_event >= self.max_delay:
+                        self.on_change(None if None in pending else pending)
+                        pending = set()
+                        first_event = last_event = None
+        finally:
+            os.close(fd)
+
+    def _snapshot(self):
+        """폴링용 {경로: (size, mtime)} 스냅샷"""
+        result = {}
+        stack = [self.root_dir]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.name.endswith(".jsonl"):
+                                st = entry.stat()
+                                result[entry.path] = (st.st_size, st.st_mtime)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return result
+
+    def _run_polling(self):
+        """inotify를 못 쓰는 환경용 폴링 루프"""
+        self.mode = "polling"
+        known = self._snapshot()
+        interval = self.poll_interval
+        while True:
+            factor = RefreshScheduler.BATTERY_FACTOR if self.battery.on_battery() else 1
+            if self._stop.wait(interval * factor):
+                break
+            current = self._snapshot()
+            changed = {path for path, sig in current.items() if known.get(path) != sig}
+            known = current
+            if changed:
+                interval = self.poll_interval
+                self.on_change(changed)
+            else:
+                # 조용하면 트리 전체 stat을 점점 드물게
+                interval = min(interval * 2, self.max_interval)
@@ -0,0 +1,72 @@
+"""백그라운드 스캔 워커"""
+
+import queue
+import threading
+
+
+class ScanWorker:
+    """백그라운드 스캔 워커 - Tk 메인루프를 막지 않도록 스캔을 별도 스레드에서 실행
+
+    - request()를 여러 번 불러도 대기 중인 요청은 한 번의 스캔으로 합쳐짐
+    - 결과(또는 예외)는 results 큐로 전달되고 UI 쪽에서 after로 폴링
+    - stop()으로 진행 중인 스캔을 파일 단위로 취소
+    """
+
+    def __init__(self, scan_func):
+        self.scan_func = scan_func  # scan_func(cancel, paths)
+        self.results = queue.Queue()
+        self._lock = threading.Lock()
+        self._full = False
+        self._paths = set()
+        self._wake = threading.Event()
+        self._scanning = False
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="ClaudeUsageScan", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def request(self, paths=None):
+        """스캔 요청 - paths가 None이면 전체 스캔, 아니면 해당 파일만 증분 스캔 (대기 중인 요청과 합쳐짐)"""
+        with self._lock:
+            if paths is None:
+                self._full = True
+            else:
+                self._paths.update(paths)
+        self._wake.set()
+
+    def pending(self):
+        """대기 중인 요청이 있거나 스캔 중이면 True (결과가 곧 올 수 있음)"""
+        return self._wake.is_set() or self._scanning
+
+    def is_cancelled(self):
+        return self._stop.is_set()
+
+    def stop(self, timeout=2.0):
+        """워커 종료 (진행 중인 스캔은 다음 파일 경계에서 중단)"""
+        self._stop.set()
+        self._wake.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout)
+        return not self.thread.is_alive()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            if self._stop.is_set():
+                break
+            self._scanning = True
+            self._wake.clear()
+            with self._lock:
+                paths = None if self._full else self._paths
+                self._full = False
+                self._paths = set()
+            try:
+                result = self.scan_func(self.is_cancelled, paths)
+            except Exception as e:
+                result = e
+            if self._stop.is_set():
+                break
+            if result is not None:
+                self.results.put(result)
+            self._scanning = False
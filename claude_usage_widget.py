@@ -3,38 +3,89 @@ Claude Code Usage Widget 🤖
 Windows 데스크톱 위젯 - 로컬 기반 Claude 사용량 모니터링
 - 항상 상단 표시 (ㄹㅇ 진짜 항상)
 - 시작 프로그램 자동 등록
-- 30초마다 갱신 (딱 화장실 다녀올 시간)
+- 로그가 바뀌면 바로 갱신 (+ 윈도우 재계산은 쓰는 중이면 5초, 조용하면 최대 5분, 리셋 시각엔 딱 맞춰)
 """
 
-import json
 import os
 import sys
+import time
+import queue
+import threading
+import multiprocessing
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime, timedelta, timezone
-from pathlib import Path
-import winreg
-import ctypes
+from datetime import datetime, timezone
 import random
 
+from claude_usage import (APP_NAME, DirectoryWatcher, MetricsLog, RefreshScheduler, ScanWorker, UsageEngine,
+                          UsageServer)
+from claude_usage.breakdown import format_tokens
+from claude_usage.forecast import format_limit_eta
 
-class ClaudeUsageWidget:
-    # 플랜별 5시간 세션 한도 (input + output tokens 기준)
-    PLAN_LIMITS = {
-        "pro": 55000,       # ~55K
-        "max": 110000,      # ~110K
-        "max_5x": 110000,   # ~110K
-        "max_20x": 275000,  # ~275K
-    }
 
-    # 플랜별 주간 한도 (input + output tokens 기준)
-    WEEKLY_LIMITS = {
-        "pro": 190000,      # ~190K
-        "max": 380000,      # ~380K
-        "max_5x": 380000,   # ~380K
-        "max_20x": 950000,  # ~950K
-    }
+class ViewModel:
+    """화면에 올라가 있는 위젯 옵션을 기억해 두고 바뀐 것만 Tk에 config (그대로면 아무것도 안 함)
 
+    같은 위젯은 항상 여기를 거쳐서 바꿔야 기억하는 값이 화면과 어긋나지 않음
+    """
+
+    def __init__(self):
+        self.shown = {}  # 위젯 -> {옵션: 값}
+
+    def set(self, widget, **options):
+        """바뀐 옵션만 반영 → 하나라도 바뀌었으면 True"""
+        shown = self.shown.setdefault(widget, {})
+        changed = {key: value for key, value in options.items() if shown.get(key) != value}
+        if changed:
+            widget.config(**changed)
+            shown.update(changed)
+        return bool(changed)
+
+
+class ProgressAnimator:
+    """진행 막대 너비를 목표값까지 부드럽게 바꿈 (FPS 제한, 도착하면 타이머 멈춤)"""
+
+    FPS = 30
+    DURATION = 0.4  # 초
+
+    def __init__(self, root):
+        self.root = root
+        self.bars = {}  # 막대 -> [지금 너비, 출발 너비, 목표 너비, 출발 시각]
+        self.job = None
+
+    def set(self, bar, target):
+        state = self.bars.setdefault(bar, [0.0, 0.0, 0.0, 0.0])
+        if abs(target - state[2]) < 0.0005:
+            return
+        state[1:] = [state[0], target, time.monotonic()]
+        if self.job is None:
+            self.job = self.root.after(0, self.step)
+
+    def step(self):
+        self.job = None
+        now = time.monotonic()
+        moving = False
+        for bar, state in self.bars.items():
+            shown, start, target, started = state
+            if shown == target:
+                continue
+            progress = min(1.0, (now - started) / self.DURATION)
+            # ease-out: 처음엔 빠르게, 도착할 때 천천히
+            value = target if progress >= 1 else start + (target - start) * (1 - (1 - progress) ** 3)
+            if round(value, 3) != round(shown, 3):
+                bar.place(relwidth=value, relheight=1)
+            state[0] = value
+            moving = moving or value != target
+        if moving:
+            self.job = self.root.after(1000 // self.FPS, self.step)
+
+    def stop(self):
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+
+
+class ClaudeUsageWidget:
     # MZ스러운 상태 메시지들
     STATUS_MESSAGES = {
         "low": [
@@ -67,79 +118,122 @@ class ClaudeUsageWidget:
         ]
     }
 
-    APP_NAME = "ClaudeUsageWidget"
+    APP_NAME = APP_NAME
 
-    def __init__(self):
-        self.claude_dir = Path.home() / ".claude"
-        self.projects_dir = self.claude_dir / "projects"
+    # 대량 파싱 시 최대 프로세스 수
+    MAX_PARSE_WORKERS = 4
+
+    # 감시 중에도 이벤트 유실 대비로 가끔은 전체 재스캔 (초)
+    FULL_RESCAN_INTERVAL = 600
 
-        # 플랜 정보 로드
-        self.plan_type, self.rate_tier = self.get_plan_info()
-        self.session_limit = self.get_session_limit()
-        self.weekly_limit = self.get_weekly_limit()
+    # 리셋 카운트다운 등 시계 문구만 다시 그리는 주기 (초, 스캔 없음)
+    CLOCK_INTERVAL = 30
 
-        # UI 초기화
+    # 결과 큐 폴링 주기 (ms) - 스캔/기록 로딩을 기다릴 때만 자주, 평소엔 드물게
+    POLL_BUSY_MS = 100
+    POLL_IDLE_MS = 1000
+
+    # 사용량 단계가 그대로면 상태 메시지는 이 간격(초)보다 자주 안 바꿈
+    STATUS_MESSAGE_INTERVAL = 300
+
+    # 창 크기 (상세 패널 / 성능 오버레이를 펼치면 높이만 내용에 맞춰 늘어남)
+    WINDOW_WIDTH = 280
+    WINDOW_HEIGHT = 200
+
+    # 플랜 등급별 표시 이름
+    PLAN_DISPLAY_NAMES = {
+        "max_20x": "MAX20 🔥",
+        "max_5x": "MAX5 ⚡",
+        "pro": "PRO ✨",
+    }
+
+    def __init__(self):
+        # 헤드리스 사용량 엔진 (플랜 정보 + 인덱스)
+        # 처음 켤 때처럼 읽을 로그가 많으면 코어 몇 개로 나눠서 파싱
+        self.engine = UsageEngine(workers=min(self.MAX_PARSE_WORKERS, os.cpu_count() or 1),
+                                  sync_dir=os.environ.get("CLAUDE_USAGE_SYNC_DIR"))
+        self.projects_dir = self.engine.projects_dir
+        # 갱신마다 단계별 시간 / 카운터를 JSONL로 남김 (느려질 때 사용자 PC에서 바로 확인용)
+        self.metrics_log = MetricsLog(self.engine.cache_dir / "metrics.jsonl")
+        self.show_metrics = False
+        self.show_breakdown = False
+        self.latest_snapshot = None
+        # 사용 기록 창 (장기 보관소는 별도 스레드에서 읽음)
+        self.history_window = None
+        self.history_step = "day"
+        self.history_thread = None
+        self.history_results = queue.Queue()
+
+        # UI 초기화 (화면 갱신은 바뀐 값만 반영하는 뷰 모델을 거침)
         self.root = tk.Tk()
+        self.view = ViewModel()
+        self.progress = ProgressAnimator(self.root)
+        self.status_level = None
+        self.status_text = ""
+        self.status_picked_at = 0.0
         self.is_visible = True
         self.setup_window()
         self.create_widgets()
         self.create_context_menu()
 
-        # 시작 프로그램 등록 확인
-        if not self.is_startup_registered():
+        # 시작 프로그램 등록 확인 (Windows 전용)
+        if sys.platform == "win32" and not self.is_startup_registered():
             self.register_startup()
 
+        # 백그라운드 스캔 워커 + 로그 폴더 감시 시작
+        self.worker = ScanWorker(lambda cancel, paths: self.engine.scan(
+            paths=paths, cancel=cancel, breakdown=self.show_breakdown))
+        self.worker.start()
+        self.watcher = DirectoryWatcher(self.projects_dir, self.worker.request)
+        self.watcher.start()
+        self.engine.watcher = self.watcher
+        self.last_full_scan = 0
+        # 윈도우 재계산 주기 (사용 중 / 한도 근처면 짧게, 조용하면 점점 길게)
+        self.scheduler = RefreshScheduler()
+        self.update_job = None
+        self.poll_results()
+        self.clock_job = self.root.after(self.CLOCK_INTERVAL * 1000, self.tick_clock)
+
+        # 다른 도구(tmux, 프롬프트, 대시보드)가 스캔 없이 읽어 가도록 최신 결과를 localhost로 제공
+        # 포트를 이미 쓰고 있으면(데몬이나 다른 위젯) 그냥 안 띄움
+        self.server = UsageServer(lambda: self.latest_snapshot)
+        try:
+            self.server.start()
+        except OSError:
+            self.server = None
+
         # 초기 업데이트 및 자동 갱신 시작
         self.update_usage()
         self.schedule_update()
 
-    def get_plan_info(self):
-        """credentials.json에서 플랜 정보 읽기"""
-        credentials_path = self.claude_dir / ".credentials.json"
-        try:
-            with open(credentials_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                oauth = data.get("claudeAiOauth", {})
-                plan_type = oauth.get("subscriptionType", "pro")
-                rate_tier = oauth.get("rateLimitTier", "")
-                return plan_type, rate_tier
-        except Exception:
-            return "pro", ""
-
-    def get_session_limit(self):
-        """플랜에 따른 5시간 세션 한도 반환"""
-        if "max_20" in self.rate_tier or "20x" in self.rate_tier:
-            return self.PLAN_LIMITS["max_20x"]
-        elif "max_5" in self.rate_tier or "5x" in self.rate_tier or self.plan_type == "max":
-            return self.PLAN_LIMITS["max_5x"]
-        return self.PLAN_LIMITS["pro"]
-
-    def get_weekly_limit(self):
-        """플랜에 따른 주간 한도 반환"""
-        if "max_20" in self.rate_tier or "20x" in self.rate_tier:
-            return self.WEEKLY_LIMITS["max_20x"]
-        elif "max_5" in self.rate_tier or "5x" in self.rate_tier or self.plan_type == "max":
-            return self.WEEKLY_LIMITS["max_5x"]
-        return self.WEEKLY_LIMITS["pro"]
-
     def get_plan_display_name(self):
         """표시용 플랜 이름"""
-        if "max_20" in self.rate_tier or "20x" in self.rate_tier:
-            return "MAX20 🔥"
-        elif "max_5" in self.rate_tier or "5x" in self.rate_tier or self.plan_type == "max":
-            return "MAX5 ⚡"
-        return "PRO ✨"
+        return self.PLAN_DISPLAY_NAMES[self.engine.plan_tier]
 
-    def get_status_message(self, percent):
-        """퍼센트에 따른 상태 메시지 반환"""
+    def get_status_level(self, percent):
+        """퍼센트에 따른 상태 단계 (low / medium / high / critical)"""
         if percent >= 90:
-            return random.choice(self.STATUS_MESSAGES["critical"])
+            return "critical"
         elif percent >= 70:
-            return random.choice(self.STATUS_MESSAGES["high"])
+            return "high"
         elif percent >= 40:
-            return random.choice(self.STATUS_MESSAGES["medium"])
+            return "medium"
         else:
-            return random.choice(self.STATUS_MESSAGES["low"])
+            return "low"
+
+    def get_status_message(self, percent):
+        """퍼센트에 따른 상태 메시지 반환"""
+        return random.choice(self.STATUS_MESSAGES[self.get_status_level(percent)])
+
+    def pick_status_message(self, percent):
+        """갱신마다 메시지가 바뀌면 정신없으니 단계가 바뀌었거나 STATUS_MESSAGE_INTERVAL이 지났을 때만 새로 뽑음"""
+        level = self.get_status_level(percent)
+        now = time.monotonic()
+        if level != self.status_level or now - self.status_picked_at >= self.STATUS_MESSAGE_INTERVAL:
+            self.status_level = level
+            self.status_text = self.get_status_message(percent)
+            self.status_picked_at = now
+        return self.status_text
 
     def setup_window(self):
         """윈도우 설정"""
@@ -149,7 +243,8 @@ class ClaudeUsageWidget:
         self.root.overrideredirect(True)
 
         # 창 크기 및 위치 (우측 상단)
-        width, height = 280, 200
+        width, height = self.WINDOW_WIDTH, self.WINDOW_HEIGHT
+        self.window_height = height
         screen_width = self.root.winfo_screenwidth()
         x = screen_width - width - 20
         y = 20
@@ -167,6 +262,14 @@ class ClaudeUsageWidget:
         self.root.bind("<Button-3>", self.show_context_menu)
         self.root.bind("<Double-Button-1>", lambda e: self.update_usage())  # 더블클릭으로 새로고침
 
+    def fit_height(self):
+        """펼친 패널까지 다 보이게 창 높이를 내용에 맞춤 (폭과 위치는 그대로)"""
+        self.root.update_idletasks()
+        height = max(self.WINDOW_HEIGHT, self.root.winfo_reqheight())
+        if height != self.window_height:
+            self.window_height = height
+            self.root.geometry(f"{self.WINDOW_WIDTH}x{height}")
+
     def start_move(self, event):
         self.x = event.x
         self.y = event.y
@@ -182,6 +285,8 @@ class ClaudeUsageWidget:
         """우클릭 컨텍스트 메뉴"""
         self.context_menu = tk.Menu(self.root, tearoff=0, bg="#1a1b26", fg="#c0caf5")
         self.context_menu.add_command(label="🔄 새로고침", command=self.update_usage)
+        self.context_menu.add_command(label="📈 사용 기록", command=self.show_history)
+        self.context_menu.add_command(label="🐞 성능 정보", command=self.toggle_metrics)
         self.context_menu.add_separator()
         self.context_menu.add_command(label="🚀 시작프로그램 등록", command=self.register_startup)
         self.context_menu.add_command(label="🗑️ 시작프로그램 해제", command=self.unregister_startup)
@@ -248,6 +353,27 @@ class ClaudeUsageWidget:
             "주간 사용량"
         )
 
+        # 프로젝트 / 모델별 상세 (펼쳤을 때만 계산 + 표시)
+        self.breakdown_toggle = tk.Label(
+            main_frame,
+            text="▸ 상세 보기",
+            font=("Segoe UI", 7),
+            fg="#565f89",
+            bg="#1a1b26",
+            cursor="hand2"
+        )
+        self.breakdown_toggle.pack(anchor="w", pady=(4, 0))
+        self.breakdown_toggle.bind("<Button-1>", lambda e: self.toggle_breakdown())
+        self.breakdown_label = tk.Label(
+            main_frame,
+            text="",
+            font=("Consolas", 7),
+            fg="#a9b1d6",
+            bg="#1a1b26",
+            justify="left",
+            wraplength=self.WINDOW_WIDTH - 28
+        )
+
         # 마지막 업데이트 시간
         self.update_label = tk.Label(
             main_frame,
@@ -258,6 +384,17 @@ class ClaudeUsageWidget:
         )
         self.update_label.pack(pady=(6, 0))
 
+        # 성능 오버레이 (우클릭 메뉴에서 켰을 때만 표시)
+        self.metrics_label = tk.Label(
+            main_frame,
+            text="",
+            font=("Consolas", 7),
+            fg="#565f89",
+            bg="#1a1b26",
+            justify="left",
+            wraplength=self.WINDOW_WIDTH - 28
+        )
+
     def create_usage_section(self, parent, title, subtitle):
         """사용량 섹션 생성"""
         frame = tk.Frame(parent, bg="#1a1b26")
@@ -310,137 +447,11 @@ class ClaudeUsageWidget:
             "progress_bar": progress_bar
         }
 
-    def get_tokens_from_jsonl(self, filepath, since_time=None, msg_tokens=None):
-        """JSONL 파일에서 토큰 사용량 추출 (메시지 ID 기준 중복 제거)"""
-        if msg_tokens is None:
-            msg_tokens = {}
-
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                for line in f:
-                    try:
-                        data = json.loads(line.strip())
-
-                        # 타임스탬프 필터링
-                        if since_time:
-                            timestamp_str = data.get("timestamp", "")
-                            if timestamp_str:
-                                try:
-                                    ts = datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
-                                    if ts.replace(tzinfo=None) < since_time:
-                                        continue
-                                except:
-                                    pass
-
-                        # 메시지에서 usage 추출
-                        message = data.get("message", {})
-                        usage = message.get("usage", {})
-
-                        if usage:
-                            # Claude Code 사용량 = input + output tokens
-                            output_tokens = usage.get("output_tokens", 0)
-                            input_tokens = usage.get("input_tokens", 0)
-                            total_tokens = output_tokens + input_tokens
-                            msg_id = message.get("id", "")
-
-                            # 메시지 ID가 있으면 중복 제거 (최대값만 저장)
-                            if msg_id:
-                                if msg_id not in msg_tokens or msg_tokens[msg_id] < total_tokens:
-                                    msg_tokens[msg_id] = total_tokens
-                            else:
-                                # ID 없는 메시지는 고유 키 생성
-                                unique_key = f"{filepath}_{data.get('uuid', '')}"
-                                if unique_key not in msg_tokens:
-                                    msg_tokens[unique_key] = total_tokens
-                    except json.JSONDecodeError:
-                        continue
-        except Exception:
-            pass
-        return msg_tokens
-
-    def get_usage_since(self, hours=5):
-        """특정 시간 이후의 사용량 계산 (중복 제거)"""
-        # UTC 기준으로 계산 (jsonl 타임스탬프가 UTC)
-        since_time = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=hours)
-        msg_tokens = {}  # 전체 파일에서 메시지 ID 중복 제거
-
-        if not self.projects_dir.exists():
-            return 0
-
-        for jsonl_file in self.projects_dir.rglob("*.jsonl"):
-            try:
-                mtime = datetime.fromtimestamp(jsonl_file.stat().st_mtime)
-                if mtime < since_time:
-                    continue
-                msg_tokens = self.get_tokens_from_jsonl(jsonl_file, since_time, msg_tokens)
-            except:
-                continue
-
-        return sum(msg_tokens.values())
-
-    def get_weekly_usage(self):
-        """이번 주 월요일부터의 사용량 계산 (중복 제거)"""
-        # UTC 기준으로 계산 (jsonl 타임스탬프가 UTC)
-        now = datetime.now(timezone.utc).replace(tzinfo=None)
-        monday = now - timedelta(days=now.weekday())
-        monday = monday.replace(hour=0, minute=0, second=0, microsecond=0)
-
-        msg_tokens = {}  # 전체 파일에서 메시지 ID 중복 제거
-
-        if not self.projects_dir.exists():
-            return 0
-
-        for jsonl_file in self.projects_dir.rglob("*.jsonl"):
-            try:
-                mtime = datetime.fromtimestamp(jsonl_file.stat().st_mtime)
-                if mtime < monday:
-                    continue
-                msg_tokens = self.get_tokens_from_jsonl(jsonl_file, monday, msg_tokens)
-            except:
-                continue
-
-        return sum(msg_tokens.values())
-
-    def get_first_message_time(self):
-        """최근 5시간 내 첫 번째 메시지 시간 찾기"""
-        five_hours_ago = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=5)
-        first_time = None
-
-        if not self.projects_dir.exists():
-            return None
-
-        for jsonl_file in self.projects_dir.rglob("*.jsonl"):
-            try:
-                mtime = datetime.fromtimestamp(jsonl_file.stat().st_mtime)
-                if mtime < five_hours_ago:
-                    continue
-
-                with open(jsonl_file, "r", encoding="utf-8") as f:
-                    for line in f:
-                        try:
-                            data = json.loads(line.strip())
-                            timestamp_str = data.get("timestamp", "")
-                            if timestamp_str:
-                                ts = datetime.fromisoformat(timestamp_str.replace("Z", "+00:00")).replace(tzinfo=None)
-                                if ts >= five_hours_ago:
-                                    if first_time is None or ts < first_time:
-                                        first_time = ts
-                                    break  # 파일 내 첫 번째만 확인
-                        except:
-                            continue
-            except:
-                continue
-
-        return first_time
-
-    def get_session_reset_str(self):
-        """5시간 롤링 윈도우 리셋 시간"""
-        first_time = self.get_first_message_time()
-        if first_time is None:
+    def get_session_reset_str(self, reset_time):
+        """5시간 세션 블록 리셋 시간 (블록 시작 정시 + 5시간)"""
+        if reset_time is None:
             return "🔄 세션 없음"
 
-        # 첫 메시지 + 5시간 = 리셋 시간
-        reset_time = first_time + timedelta(hours=5)
         now = datetime.now(timezone.utc).replace(tzinfo=None)
         delta = reset_time - now
 
@@ -452,16 +463,12 @@ class ClaudeUsageWidget:
 
         return f"🔄 {hours}시간 {minutes}분 후 리셋"
 
-    def get_weekly_reset_str(self):
-        """주간 리셋 시간 문자열"""
-        now = datetime.now()
-        days_until_monday = (7 - now.weekday()) % 7
-        if days_until_monday == 0 and now.hour >= 0:
-            days_until_monday = 7
-        next_monday = now + timedelta(days=days_until_monday)
-        next_monday = next_monday.replace(hour=0, minute=0, second=0, microsecond=0)
+    def get_weekly_reset_str(self, reset_time):
+        """주간 리셋 시간 문자열 (다음 주 월요일 0시, 로컬 시간대)"""
+        if reset_time is None:
+            return "🗓️ 주간 리셋"
 
-        delta = next_monday - now
+        delta = reset_time - datetime.now(timezone.utc)
         days = delta.days
         hours = delta.seconds // 3600
 
@@ -471,41 +478,228 @@ class ClaudeUsageWidget:
             return f"🗓️ {hours}시간 후 리셋 (곧이다!)"
 
     def update_usage(self):
-        """사용량 업데이트"""
+        """사용량 업데이트 요청 (실제 스캔은 백그라운드 워커에서)"""
+        self.last_full_scan = time.monotonic()
+        self.worker.request()
+        self.poll_soon()
+
+    def poll_results(self):
+        """워커 결과 큐 폴링 → UI 반영"""
+        # 큐를 비우기 전에 봐야 그 사이에 들어온 결과를 1초씩 묵히지 않음
+        busy = self.worker.pending() or (self.history_thread is not None and self.history_thread.is_alive())
         try:
-            # 5시간 세션 사용량
-            session_tokens = self.get_usage_since(5)
-            session_percent = min(100, (session_tokens / self.session_limit) * 100)
-
-            # 주간 사용량
-            weekly_tokens = self.get_weekly_usage()
-            weekly_percent = min(100, (weekly_tokens / self.weekly_limit) * 100)
+            while True:
+                result = self.worker.results.get_nowait()
+                if isinstance(result, Exception):
+                    self.view.set(self.status_label, text=f"앗! 에러 발생 😵: {str(result)[:15]}")
+                    self.schedule_update()
+                else:
+                    self.apply_snapshot(result)
+                    self.schedule_update(result)
+        except queue.Empty:
+            pass
+        try:
+            while True:
+                self.draw_history(*self.history_results.get_nowait())
+        except queue.Empty:
+            pass
+        self.poll_job = self.root.after(self.POLL_BUSY_MS if busy else self.POLL_IDLE_MS, self.poll_results)
+
+    def poll_soon(self):
+        """요청을 넣은 직후 - 느린 주기로 잡혀 있던 폴링을 앞당김"""
+        self.root.after_cancel(self.poll_job)
+        self.poll_job = self.root.after(self.POLL_BUSY_MS, self.poll_results)
+
+    def toggle_breakdown(self):
+        """상세 패널 펼치기/접기 (펼치면 윈도우만 재계산해서 바로 채움)"""
+        self.show_breakdown = not self.show_breakdown
+        if self.show_breakdown:
+            self.view.set(self.breakdown_toggle, text="▾ 접기")
+            self.view.set(self.breakdown_label, text="계산 중... 🔄")
+            self.breakdown_label.pack(anchor="w", before=self.update_label)
+            self.worker.request(())
+            self.poll_soon()
+        else:
+            self.view.set(self.breakdown_toggle, text="▸ 상세 보기")
+            self.breakdown_label.pack_forget()
+        self.fit_height()
+
+    def format_breakdown(self, snapshot):
+        """상세 패널 텍스트 (이번 주 프로젝트 / 모델별)"""
+        breakdown = snapshot.weekly_breakdown
+        lines = ["📁 프로젝트 (주간)"]
+        lines += breakdown.format_lines("project", limit=4, compact=True) or ["  (없음)"]
+        lines.append("🧠 모델 (주간)")
+        lines += breakdown.format_lines("model", limit=3, compact=True) or ["  (없음)"]
+        return "\n".join(lines)
+
+    def show_history(self):
+        """사용 기록 창 (시간 / 일 / 주 / 월 막대 그래프)"""
+        if self.history_window is not None and self.history_window.winfo_exists():
+            self.history_window.lift()
+            return
+        window = tk.Toplevel(self.root)
+        window.title("📈 사용 기록")
+        window.configure(bg="#1a1b26")
+        window.attributes("-topmost", True)
+
+        buttons = tk.Frame(window, bg="#1a1b26")
+        buttons.pack(fill="x", padx=10, pady=(8, 0))
+        for step, label in (("hour", "시간"), ("day", "일"), ("week", "주"), ("month", "월")):
+            tk.Button(
+                buttons,
+                text=label,
+                command=lambda step=step: self.load_history(step),
+                font=("Segoe UI", 8),
+                fg="#c0caf5",
+                bg="#24283b",
+                relief="flat"
+            ).pack(side="left", padx=(0, 4))
+
+        self.history_canvas = tk.Canvas(window, width=480, height=200, bg="#1a1b26", highlightthickness=0)
+        self.history_canvas.pack(padx=10, pady=8)
+        self.history_window = window
+        self.load_history(self.history_step)
+
+    def load_history(self, step):
+        """기록 계산 요청 (처음 한 번은 예전 로그를 전부 읽어서 몇 초 걸릴 수 있음)"""
+        self.history_step = step
+        if self.history_thread is not None and self.history_thread.is_alive():
+            # 끝나면 draw_history가 마지막으로 고른 단위로 다시 요청
+            return
+        self.history_canvas.delete("all")
+        self.history_canvas.create_text(240, 100, text="기록 불러오는 중... 🔄", fill="#565f89",
+                                        font=("Segoe UI", 9))
+
+        def work():
+            try:
+                result = self.engine.get_history(step)
+            except Exception as e:
+                result = e
+            self.history_results.put((step, result))
+
+        self.history_thread = threading.Thread(target=work, name="ClaudeUsageHistory", daemon=True)
+        self.history_thread.start()
+        self.poll_soon()
+
+    def draw_history(self, step, history):
+        """기록 막대 그래프 그리기 (마지막 막대 = 지금 구간)"""
+        if self.history_window is None or not self.history_window.winfo_exists():
+            return
+        if step != self.history_step:
+            self.load_history(self.history_step)
+            return
+        canvas = self.history_canvas
+        canvas.delete("all")
+        if not history or isinstance(history, Exception):
+            canvas.create_text(240, 100, text=f"기록을 못 불러왔어요 😵 {str(history or '')[:20]}",
+                               fill="#f7768e", font=("Segoe UI", 9))
+            return
+
+        width, top, bottom = 480, 24, 180
+        peak = max(tokens for _, tokens in history) or 1
+        total = sum(tokens for _, tokens in history)
+        canvas.create_text(4, 8, anchor="w", fill="#a9b1d6", font=("Segoe UI", 8),
+                           text=f"합계 {format_tokens(total)} · 최고 {format_tokens(peak)}")
+        label_format = {"hour": "%H시", "day": "%m/%d", "week": "%m/%d", "month": "%y.%m"}[step]
+        label_every = max(1, len(history) // 8)
+        bar_width = width / len(history)
+        for i, (start, tokens) in enumerate(history):
+            x = i * bar_width
+            height = tokens / peak * (bottom - top)
+            color = "#9ece6a" if i == len(history) - 1 else "#7aa2f7"
+            if tokens:
+                canvas.create_rectangle(x + 1, bottom - height, x + max(bar_width - 1, 2), bottom,
+                                        fill=color, width=0)
+            if (len(history) - 1 - i) % label_every == 0:
+                canvas.create_text(x + bar_width / 2, bottom + 10, text=start.strftime(label_format),
+                                   fill="#565f89", font=("Consolas", 7))
+
+    def toggle_metrics(self):
+        """성능 오버레이 켜기/끄기"""
+        self.show_metrics = not self.show_metrics
+        if self.show_metrics:
+            self.view.set(self.metrics_label, text="다음 갱신 때 표시돼요 ⏳")
+            self.metrics_label.pack(anchor="w", pady=(4, 0))
+        else:
+            self.metrics_label.pack_forget()
+        self.fit_height()
+
+    def apply_snapshot(self, snapshot):
+        """스캔 결과를 UI에 반영 (반영에 걸린 시간도 계측에 포함)"""
+        metrics = snapshot.metrics
+        if metrics is None:
+            self.render_snapshot(snapshot)
+            return
+        with metrics.phase("render"):
+            self.render_snapshot(snapshot)
+            # Tk가 실제로 다시 그리는 시간까지 포함
+            self.root.update_idletasks()
+        self.metrics_log.write(metrics.to_dict())
+        if self.show_metrics:
+            self.view.set(self.metrics_label, text="\n".join(metrics.format_lines()))
+            self.fit_height()
+
+    def render_snapshot(self, snapshot):
+        """스캔 결과를 UI에 반영"""
+        self.latest_snapshot = snapshot
+        try:
+            session_percent = snapshot.session_percent
+            weekly_percent = snapshot.weekly_percent
 
             # 상태 메시지 업데이트 (더 높은 퍼센트 기준)
             max_percent = max(session_percent, weekly_percent)
-            self.status_label.config(text=self.get_status_message(max_percent))
+            self.view.set(self.status_label, text=self.pick_status_message(max_percent))
 
-            # UI 업데이트 - 세션
-            self.update_section(
-                self.session_frame,
-                session_percent,
-                self.get_session_reset_str()
-            )
+            # UI 업데이트 - 세션 / 주간
+            session_subtitle, weekly_subtitle = self.format_subtitles(snapshot)
+            self.update_section(self.session_frame, session_percent, session_subtitle)
+            self.update_section(self.weekly_frame, weekly_percent, weekly_subtitle)
 
-            # UI 업데이트 - 주간
-            self.update_section(
-                self.weekly_frame,
-                weekly_percent,
-                self.get_weekly_reset_str()
-            )
+            # 상세 패널 (펼쳐져 있을 때만 분해표가 같이 옴)
+            if self.show_breakdown and snapshot.weekly_breakdown is not None:
+                self.view.set(self.breakdown_label, text=self.format_breakdown(snapshot))
+                self.fit_height()
 
             # 마지막 업데이트 시간
-            now = datetime.now()
-            self.update_label.config(
-                text=f"마지막 업데이트: {now.strftime('%H:%M:%S')} | 더블클릭하면 새로고침 👆"
-            )
+            self.view.set(self.update_label, text=self.format_update_time(snapshot))
         except Exception as e:
-            self.status_label.config(text=f"앗! 에러 발생 😵: {str(e)[:15]}")
+            self.view.set(self.status_label, text=f"앗! 에러 발생 😵: {str(e)[:15]}")
+
+    def format_subtitles(self, snapshot):
+        """(세션, 주간) 부제 - 리셋까지 남은 시간 + 리셋 전에 한도 찍을 페이스면 예상 시간 (이미 넘었으면 한도 도달)
+
+        스캔 없이 시계만 다시 그릴 때도 쓰므로 예측 시간은 스캔 뒤 지난 만큼 빼서 표시
+        """
+        forecast = snapshot.forecast
+        elapsed = (datetime.now() - snapshot.scanned_at).total_seconds()
+
+        def limit_eta(eta):
+            return format_limit_eta(eta if eta <= 0 else max(1, eta - elapsed))
+
+        session_subtitle = self.get_session_reset_str(snapshot.session_reset_time)
+        if forecast is not None and forecast.session_hits_limit:
+            session_subtitle += f" · {limit_eta(forecast.session_eta)}"
+        weekly_subtitle = self.get_weekly_reset_str(snapshot.weekly_reset_time)
+        if forecast is not None and forecast.weekly_hits_limit:
+            weekly_subtitle += f" · {limit_eta(forecast.weekly_eta)}"
+        return session_subtitle, weekly_subtitle
+
+    def format_update_time(self, snapshot):
+        """마지막 업데이트 문구 (1분 넘게 지났으면 몇 분 전인지도)"""
+        minutes = int((datetime.now() - snapshot.scanned_at).total_seconds() // 60)
+        ago = f" ({minutes}분 전)" if minutes > 0 else ""
+        return f"마지막 업데이트: {snapshot.scanned_at.strftime('%H:%M:%S')}{ago} | 더블클릭하면 새로고침 👆"
+
+    def tick_clock(self):
+        """스캔 없이 리셋 카운트다운 / 마지막 업데이트 문구만 다시 그림 (갱신 주기가 길어져도 시계는 맞게)"""
+        snapshot = self.latest_snapshot
+        if snapshot is not None:
+            session_subtitle, weekly_subtitle = self.format_subtitles(snapshot)
+            self.view.set(self.session_frame["subtitle_label"], text=session_subtitle)
+            self.view.set(self.weekly_frame["subtitle_label"], text=weekly_subtitle)
+            self.view.set(self.update_label, text=self.format_update_time(snapshot))
+        self.clock_job = self.root.after(self.CLOCK_INTERVAL * 1000, self.tick_clock)
 
     def update_section(self, section, percent, subtitle):
         """섹션 UI 업데이트"""
@@ -519,23 +713,32 @@ class ClaudeUsageWidget:
         else:
             color = "#ff007c"  # 핫핑크 (위험!)
 
-        section["percent_label"].config(text=f"{percent:.1f}%", fg=color)
-        section["subtitle_label"].config(text=subtitle)
-        section["progress_bar"].config(bg=color)
-        section["progress_bar"].place(relwidth=percent/100, relheight=1)
+        self.view.set(section["percent_label"], text=f"{percent:.1f}%", fg=color)
+        self.view.set(section["subtitle_label"], text=subtitle)
+        self.view.set(section["progress_bar"], bg=color)
+        self.progress.set(section["progress_bar"], percent / 100)
 
-    def schedule_update(self):
-        """30초마다 자동 업데이트"""
-        self.root.after(30000, self.auto_update)
+    def schedule_update(self, snapshot=None):
+        """다음 자동 업데이트 예약 (결과가 올 때마다 그 결과 기준으로 다시 잡음)"""
+        if self.update_job is not None:
+            self.root.after_cancel(self.update_job)
+        delay = self.scheduler.next_delay(snapshot)
+        self.update_job = self.root.after(max(1, int(delay * 1000)), self.auto_update)
 
     def auto_update(self):
-        """자동 업데이트 실행"""
-        self.update_usage()
-        self.schedule_update()
+        """자동 업데이트 실행 (감시 중이면 파일은 이벤트로 들어오니 윈도우만 재계산)"""
+        if self.watcher.mode is None or time.monotonic() - self.last_full_scan >= self.FULL_RESCAN_INTERVAL:
+            self.update_usage()
+        else:
+            self.worker.request(())
+            self.poll_soon()
+        # 결과가 오면 거기서 다시 잡히고, 안 오면 가장 긴 주기로 한 번 더
+        self.update_job = self.root.after(int(self.scheduler.longest_delay() * 1000), self.auto_update)
 
     def is_startup_registered(self):
         """시작 프로그램 등록 여부 확인"""
         try:
+            import winreg
             key = winreg.OpenKey(
                 winreg.HKEY_CURRENT_USER,
                 r"Software\Microsoft\Windows\CurrentVersion\Run",
@@ -554,6 +757,7 @@ class ClaudeUsageWidget:
     def register_startup(self):
         """시작 프로그램에 등록"""
         try:
+            import winreg
             key = winreg.OpenKey(
                 winreg.HKEY_CURRENT_USER,
                 r"Software\Microsoft\Windows\CurrentVersion\Run",
@@ -577,13 +781,14 @@ class ClaudeUsageWidget:
             winreg.SetValueEx(key, self.APP_NAME, 0, winreg.REG_SZ, command)
             winreg.CloseKey(key)
 
-            self.status_label.config(text="✅ 시작프로그램 등록 완료!")
+            self.view.set(self.status_label, text="✅ 시작프로그램 등록 완료!")
         except Exception as e:
-            self.status_label.config(text=f"❌ 등록 실패: {str(e)[:15]}")
+            self.view.set(self.status_label, text=f"❌ 등록 실패: {str(e)[:15]}")
 
     def unregister_startup(self):
         """시작 프로그램에서 제거"""
         try:
+            import winreg
             key = winreg.OpenKey(
                 winreg.HKEY_CURRENT_USER,
                 r"Software\Microsoft\Windows\CurrentVersion\Run",
@@ -592,12 +797,22 @@ class ClaudeUsageWidget:
             winreg.DeleteValue(key, self.APP_NAME)
             winreg.CloseKey(key)
 
-            self.status_label.config(text="🗑️ 시작프로그램 해제 완료!")
+            self.view.set(self.status_label, text="🗑️ 시작프로그램 해제 완료!")
         except Exception as e:
-            self.status_label.config(text=f"❌ 해제 실패: {str(e)[:15]}")
+            self.view.set(self.status_label, text=f"❌ 해제 실패: {str(e)[:15]}")
 
     def quit_app(self):
-        """앱 종료"""
+        """앱 종료 (진행 중인 스캔 취소)"""
+        self.root.after_cancel(self.poll_job)
+        if self.update_job is not None:
+            self.root.after_cancel(self.update_job)
+        self.root.after_cancel(self.clock_job)
+        self.progress.stop()
+        if self.server is not None:
+            self.server.stop()
+        self.watcher.stop()
+        if self.worker.stop():
+            self.engine.close()
         self.root.destroy()
 
     def run(self):
@@ -606,5 +821,7 @@ class ClaudeUsageWidget:
 
 
 if __name__ == "__main__":
+    # PyInstaller exe에서 파싱 프로세스 풀이 위젯을 또 띄우지 않도록
+    multiprocessing.freeze_support()
     widget = ClaudeUsageWidget()
     widget.run()